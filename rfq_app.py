@@ -7,16 +7,38 @@ Then open: http://localhost:5050
 
 import os
 import re
+import sys
 import json
-import traceback
+import math
+import time
+import bisect
+import hashlib
+import sqlite3
+import queue
+import atexit
+import logging
+import logging.handlers
+import threading
+from functools import lru_cache
 from pathlib import Path
 
 print("[startup] 1 stdlib imports OK", flush=True)
 
-from flask import Flask, request, jsonify, send_from_directory, session, redirect, url_for
+import numpy as np
+import orjson
+from flask import (Flask, Blueprint, Response, request, jsonify, send_from_directory,
+                   session, redirect, url_for, stream_with_context)
+from flask.json.provider import DefaultJSONProvider
+from flask.logging import default_handler
+from flask_compress import Compress
 from dotenv import load_dotenv
 
-print("[startup] 2 flask/dotenv imports OK", flush=True)
+print("[startup] 2 numpy/orjson/flask/flask_compress/dotenv imports OK", flush=True)
+
+try:
+    import anthropic
+except ImportError:          # /api/query reports this; everything else still works
+    anthropic = None
 
 import rfq_db
 import rfq_parser
@@ -48,9 +70,52 @@ GOOGLE_CLIENT_SECRET = os.environ.get("GOOGLE_CLIENT_SECRET", "")
 SECRET_KEY           = os.environ.get("SECRET_KEY", "dev-insecure-key-change-me")
 ALLOWED_EMAIL_DOMAIN = os.environ.get("ALLOWED_EMAIL_DOMAIN", "")
 
+class _OrjsonProvider(DefaultJSONProvider):
+    """
+    jsonify() via orjson.  The analysis endpoints return thousands of rows and
+    stdlib json dominated their response time.  Keys stay sorted like the
+    default provider; NaN/inf serialise as null instead of invalid JSON.
+    """
+    _OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    @staticmethod
+    def default(o):
+        # rfq_db.run_query hands back sqlite3.Row; turn them into objects here,
+        # at the response boundary, instead of copying every row up front
+        if isinstance(o, sqlite3.Row):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj     = self._prepare_response_obj(args, kwargs)
+        options = self._OPTIONS | orjson.OPT_APPEND_NEWLINE
+        if self._app.debug:
+            options |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=options), mimetype=self.mimetype
+        )
+
+
 app = Flask(__name__, static_folder=str(BASE_DIR), static_url_path="")
+app.json = _OrjsonProvider(app)
 app.secret_key = SECRET_KEY
 
+# Analysis payloads repeat the same keys and bidder names on every row, so
+# they compress very well.  Brotli first, gzip for clients without it.
+app.config["COMPRESS_MIMETYPES"] = ["application/json", "application/x-ndjson", "text/html"]
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+app.config["COMPRESS_MIN_SIZE"]  = 4096
+# index.html goes out as a streamed file; let conditional GETs on the
+# compressed copy's ETag still come back as 304s
+app.config["COMPRESS_STREAMING_ENDPOINT_CONDITIONAL"] = ["static", "index"]
+Compress(app)
+
 print("[startup] 5 Flask app created OK", flush=True)
 
 # Trust Render's (and any reverse proxy's) X-Forwarded-Proto / X-Forwarded-Host
@@ -58,6 +123,48 @@ print("[startup] 5 Flask app created OK", flush=True)
 from werkzeug.middleware.proxy_fix import ProxyFix
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
+# ---------------------------------------------------------------------------
+# Logging
+# ---------------------------------------------------------------------------
+
+class _JsonLogFormatter(logging.Formatter):
+    """One JSON object per line, traceback included, so logs stay grep-able."""
+
+    def format(self, record):
+        entry = {
+            "ts":     self.formatTime(record),
+            "level":  record.levelname,
+            "logger": record.name,
+            "msg":    record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode()
+
+
+# JSON lines under gunicorn (production), plain text for local runs;
+# LOG_FORMAT=json|text overrides.
+_LOG_FORMAT = os.environ.get(
+    "LOG_FORMAT", "json" if "gunicorn" in os.environ.get("SERVER_SOFTWARE", "") else "text"
+)
+
+# Request threads only format the record and enqueue it; a listener thread
+# does the stderr write, so a burst of failing requests doesn't stall workers.
+_log_queue   = queue.SimpleQueue()
+_log_handler = logging.handlers.QueueHandler(_log_queue)
+_log_handler.setFormatter(
+    _JsonLogFormatter() if _LOG_FORMAT == "json"
+    else logging.Formatter("[%(asctime)s] %(levelname)s in %(module)s: %(message)s")
+)
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+app.logger.removeHandler(default_handler)
+app.logger.addHandler(_log_handler)
+app.logger.setLevel(logging.INFO)
+app.logger.propagate = False
+
 # ---------------------------------------------------------------------------
 # Google OAuth setup
 # ---------------------------------------------------------------------------
@@ -75,12 +182,12 @@ oauth.register(
 
 print("[startup] 6 OAuth registered OK", flush=True)
 
-# Public paths that don't require authentication
-_PUBLIC_PATHS = {"/auth/login", "/auth/callback", "/auth/logout", "/health"}
+# Routes that don't require authentication live on this blueprint
+public_bp = Blueprint("public", __name__)
 
 @app.before_request
 def require_login():
-    if request.path in _PUBLIC_PATHS:
+    if request.blueprint == "public":
         return None
     if "user" not in session:
         if request.path.startswith("/api/"):
@@ -91,23 +198,23 @@ def require_login():
 # Auth routes
 # ---------------------------------------------------------------------------
 
-@app.route("/health")
+@public_bp.route("/health")
 def health():
     return "OK", 200
 
 
-@app.route("/auth/login")
+@public_bp.route("/auth/login")
 def auth_login():
-    redirect_uri = url_for("auth_callback", _external=True)
+    redirect_uri = url_for("public.auth_callback", _external=True)
     return oauth.google.authorize_redirect(redirect_uri)
 
 
-@app.route("/auth/callback")
+@public_bp.route("/auth/callback")
 def auth_callback():
     try:
         token     = oauth.google.authorize_access_token()
     except Exception as e:
-        traceback.print_exc()
+        app.logger.exception("handler %s failed", request.path)
         return (
             f"<h2>OAuth Error</h2><pre>{e}</pre>"
             f'<p><a href="/auth/login">Try again</a></p>'
@@ -131,19 +238,55 @@ def auth_callback():
     return redirect("/")
 
 
-@app.route("/auth/logout")
+@public_bp.route("/auth/logout")
 def auth_logout():
     session.clear()
     return redirect("/auth/login")
 
 
+app.register_blueprint(public_bp)
+
+
 # ---------------------------------------------------------------------------
 # /api/me  — current logged-in user
 # ---------------------------------------------------------------------------
 
+def _db_signature():
+    """(mtime_ns, size) of the database file and its WAL; moves on every commit."""
+    sig = []
+    for path in (DB_PATH, DB_PATH + "-wal"):
+        try:
+            st = os.stat(path)
+            sig += [st.st_mtime_ns, st.st_size]
+        except OSError:
+            sig += [0, 0]
+    return "-".join(map(str, sig))
+
+
+def _not_modified(tag):
+    """A 304 if the client already holds the response for this weak ETag, else None."""
+    if request.if_none_match.contains_weak(tag):
+        resp = app.response_class(status=304)
+        resp.set_etag(tag, weak=True)
+        return resp
+    return None
+
+
+def _etag_response(payload, tag):
+    """jsonify(payload) tagged so the browser revalidates it with If-None-Match."""
+    resp = jsonify(payload)
+    resp.set_etag(tag, weak=True)
+    resp.cache_control.private  = True
+    resp.cache_control.no_cache = True
+    return resp
+
+
 @app.route("/api/me")
 def api_me():
-    return jsonify(session.get("user", {}))
+    user = session.get("user", {})
+    # Tag the whole profile, so a changed name or picture is not served as a 304
+    tag  = "me-" + hashlib.sha1(orjson.dumps(user, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    return _not_modified(tag) or _etag_response(user, tag)
 
 
 # Initialise DB on startup — wrapped so a bad DB_PATH doesn't crash gunicorn
@@ -160,6 +303,16 @@ print("[startup] 8 ALL DONE — routes loading", flush=True)
 # Filename metadata extractor
 # ---------------------------------------------------------------------------
 
+_FILENAME_RE = re.compile(r'^[Ss][Tt](\w+)\s*_\s*(\w+)\s*_\s*(\w+)\s*_\s*(\d{1,2}-\d{1,2}-\d{4})$')
+
+
+def _is_filename_date(s):
+    """str-method equivalent of the \\d{1,2}-\\d{1,2}-\\d{4} tail of _FILENAME_RE."""
+    p = s.split('-')
+    return (len(p) == 3 and 1 <= len(p[0]) <= 2 and 1 <= len(p[1]) <= 2 and len(p[2]) == 4
+            and p[0].isdecimal() and p[1].isdecimal() and p[2].isdecimal())
+
+
 def _parse_filename_metadata(filename):
     """
     Extract RFQ metadata from filenames matching the pattern:
@@ -171,11 +324,20 @@ def _parse_filename_metadata(filename):
 
     Returns a dict on success, or None if the filename doesn't match.
     """
-    name = os.path.splitext(filename)[0]
-    m = re.match(r'^[Ss][Tt](\w+)\s*_\s*(\w+)\s*_\s*(\w+)\s*_\s*(\d{1,2}-\d{1,2}-\d{4})$', name)
-    if not m:
-        return None
-    station_raw, rfq_id, creator, date_raw = m.groups()
+    name  = os.path.splitext(filename)[0]
+    parts = name.split('_') if name.count('_') == 3 else ()
+    # Fast path for the usual shape — exactly three underscores, no stray
+    # whitespace — checked with str methods (isalnum/isdecimal are exactly
+    # \w-minus-underscore and \d); anything else goes through the regex.
+    if (parts and name[:2] in ("St", "ST", "st", "sT")
+            and parts[0][2:].isalnum() and parts[1].isalnum() and parts[2].isalnum()
+            and _is_filename_date(parts[3])):
+        station_raw, rfq_id, creator, date_raw = parts[0][2:], parts[1], parts[2], parts[3]
+    else:
+        m = _FILENAME_RE.match(name)
+        if not m:
+            return None
+        station_raw, rfq_id, creator, date_raw = m.groups()
     try:
         month, day, year = (int(p) for p in date_raw.split('-'))
         rfq_date = f"{year:04d}-{month:02d}-{day:02d}"
@@ -190,13 +352,48 @@ def _parse_filename_metadata(filename):
     }
 
 
+# ---------------------------------------------------------------------------
+# Parse cache — preview and load-rfq parse the same file back to back
+# ---------------------------------------------------------------------------
+
+_PARSE_CACHE_TTL  = 600   # seconds
+_PARSE_CACHE      = {}    # {(filepath, mtime_ns, size, sheet_name): (parsed_at, result)}
+_PARSE_CACHE_LOCK = threading.Lock()
+
+
+def _cached_parse(filepath, sheet_name=None):
+    """
+    rfq_parser.parse_excel, reusing a recent result while the file is unchanged.
+    A result for an auto-picked sheet is also stored under that sheet's name,
+    which is what the load step asks for.
+    """
+    st  = os.stat(filepath)
+    sig = (filepath, st.st_mtime_ns, st.st_size)
+    now = time.monotonic()
+    with _PARSE_CACHE_LOCK:
+        for key in [k for k, (t, _) in _PARSE_CACHE.items() if now - t > _PARSE_CACHE_TTL]:
+            del _PARSE_CACHE[key]
+        hit = _PARSE_CACHE.get(sig + (sheet_name,))
+    if hit:
+        return hit[1]
+
+    result = rfq_parser.parse_excel(filepath, sheet_name)
+    if "error" not in result:
+        with _PARSE_CACHE_LOCK:
+            _PARSE_CACHE[sig + (sheet_name,)]      = (now, result)
+            _PARSE_CACHE[sig + (result["sheet"],)] = (now, result)
+    return result
+
+
 # ---------------------------------------------------------------------------
 # Static / SPA
 # ---------------------------------------------------------------------------
 
 @app.route("/")
 def index():
-    return send_from_directory(str(BASE_DIR), "index.html")
+    # Short max-age plus ETag/Last-Modified: repeat visits revalidate to a 304.
+    # Assets aren't fingerprinted, so nothing gets a long-lived max-age.
+    return send_from_directory(str(BASE_DIR), "index.html", max_age=300, conditional=True)
 
 
 # ---------------------------------------------------------------------------
@@ -229,8 +426,10 @@ def parse_preview():
 
         sheet_name = (request.get_json() or {}).get("sheet_name") if request.is_json else request.form.get("sheet_name")
 
+        # Parse first: parse_excel records the sheet names, so list_sheets
+        # doesn't have to open the workbook a second time
+        result = _cached_parse(filepath, sheet_name)
         sheets = rfq_parser.list_sheets(filepath)
-        result = rfq_parser.parse_excel(filepath, sheet_name)
 
         if "error" in result:
             return jsonify({"error": result["error"]}), 422
@@ -252,7 +451,7 @@ def parse_preview():
         return jsonify(preview)
 
     except Exception as e:
-        traceback.print_exc()
+        app.logger.exception("handler %s failed", request.path)
         return jsonify({"error": str(e)}), 500
 
 
@@ -284,7 +483,7 @@ def load_rfq():
         if not os.path.exists(filepath):
             return jsonify({"error": f"File not found: {filepath}"}), 400
 
-        parsed = rfq_parser.parse_excel(filepath, sheet_name)
+        parsed = _cached_parse(filepath, sheet_name)
         if "error" in parsed:
             return jsonify({"error": parsed["error"]}), 422
 
@@ -294,6 +493,7 @@ def load_rfq():
             parsed, is_potential=is_pot, notes=notes,
             db_path=DB_PATH
         )
+        _bump_db_epoch()
 
         return jsonify({
             "status":  "loaded",
@@ -303,7 +503,7 @@ def load_rfq():
         })
 
     except Exception as e:
-        traceback.print_exc()
+        app.logger.exception("handler %s failed", request.path)
         return jsonify({"error": str(e)}), 500
 
 
@@ -314,8 +514,9 @@ def load_rfq():
 @app.route("/api/rfqs", methods=["GET"])
 def list_rfqs():
     try:
-        rows = rfq_db.get_all_rfqs(DB_PATH)
-        return jsonify(rows)
+        # Unchanged database file → unchanged list; answer polls without a query
+        tag = f"rfqs-{_db_signature()}"
+        return _not_modified(tag) or _etag_response(rfq_db.get_all_rfqs(DB_PATH), tag)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -341,6 +542,7 @@ def delete_rfq(rfq_id):
         if not rfq_db.rfq_exists(rfq_id, DB_PATH):
             return jsonify({"error": "RFQ not found"}), 404
         rfq_db.delete_rfq(rfq_id, DB_PATH)
+        _bump_db_epoch()
         return jsonify({"status": "deleted", "rfq_id": rfq_id})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -358,10 +560,48 @@ def list_bidders():
         return jsonify({"error": str(e)}), 500
 
 
+# ---------------------------------------------------------------------------
+# AI context cache
+# ---------------------------------------------------------------------------
+
+# Bumped by load_rfq / delete_rfq so the next AI query sees the change at once.
+# The TTL bucket covers writes made by other worker processes.
+_DB_EPOCH       = 0
+_AI_CONTEXT_TTL = 30   # seconds
+
+
+@lru_cache(maxsize=4)
+def _ai_context_cached(db_path, epoch, ttl_bucket):
+    return rfq_db.get_context_for_ai(db_path)
+
+
+def _ai_context():
+    """Return rfq_db.get_context_for_ai(DB_PATH), cached until the DB changes."""
+    return _ai_context_cached(DB_PATH, _DB_EPOCH, int(time.monotonic() // _AI_CONTEXT_TTL))
+
+
+def _bump_db_epoch():
+    global _DB_EPOCH
+    _DB_EPOCH += 1
+
+
 # ---------------------------------------------------------------------------
 # /api/query  — natural-language AI query
 # ---------------------------------------------------------------------------
 
+# Stage 1 replies are meant to be bare JSON but sometimes arrive fenced or
+# wrapped in prose; take the outermost {...} span.
+_JSON_OBJECT_RE = re.compile(r'\{[\s\S]*\}')
+# The generated SQL must be a query; anything else is refused before it runs
+_SELECT_SQL_RE  = re.compile(r'\s*(?:SELECT|WITH)\b', re.IGNORECASE)
+
+
+@lru_cache(maxsize=4)
+def _anthropic_client(api_key):
+    """One client per key, so its HTTP connection pool is reused across queries."""
+    return anthropic.Anthropic(api_key=api_key)
+
+
 @app.route("/api/query", methods=["POST"])
 def ai_query():
     """
@@ -384,13 +624,14 @@ def ai_query():
         if not question:
             return jsonify({"error": "question is required"}), 400
 
+        if anthropic is None:
+            return jsonify({"error": "The anthropic package is not installed. Run: pip install -r requirements.txt"}), 500
+
         api_key = ANTHROPIC_API_KEY or data.get("api_key", "")
         if not api_key:
             return jsonify({"error": "No Anthropic API key configured. Set ANTHROPIC_API_KEY environment variable or pass api_key in the request."}), 400
 
-        import anthropic
-
-        context = rfq_db.get_context_for_ai(DB_PATH)
+        context = _ai_context()
         schema  = rfq_db.get_schema_summary(DB_PATH)
 
         rfq_filter = ""
@@ -443,7 +684,7 @@ Rules:
 
         stage1_messages = [{"role": "user", "content": question}]
 
-        client = anthropic.Anthropic(api_key=api_key)
+        client = _anthropic_client(api_key)
         msg1 = client.messages.create(
             model="claude-haiku-4-5-20251001",
             max_tokens=1024,
@@ -454,13 +695,12 @@ Rules:
         raw1 = msg1.content[0].text.strip()
 
         try:
-            import re as _re
-            m = _re.search(r'\{[\s\S]*\}', raw1)
+            m = _JSON_OBJECT_RE.search(raw1)
             if not m:
                 raise json.JSONDecodeError("no JSON object found", raw1, 0)
-            ai_resp1 = json.loads(m.group(0))
+            ai_resp1 = orjson.loads(m.group(0))   # orjson.JSONDecodeError subclasses json's
         except json.JSONDecodeError:
-            print(f"[Stage1 non-JSON raw]: {raw1}")
+            app.logger.warning("Stage 1 returned non-JSON: %r", raw1)
             return jsonify({"error": "AI returned non-JSON in Stage 1", "raw": raw1}), 500
 
         sql  = ai_resp1.get("sql", "").strip()
@@ -469,12 +709,15 @@ Rules:
         # ── Execute SQL ──────────────────────────────────────────────────────
         rows      = []
         sql_error = None
-        if sql:
+        if sql and not _SELECT_SQL_RE.match(sql):
+            sql_error = "Only SELECT statements can be run."
+            app.logger.warning("AI SQL refused: intent=%r sql=%r", expl, sql)
+        elif sql:
             try:
                 rows = rfq_db.run_query(sql, DB_PATH)
             except Exception as qe:
                 sql_error = str(qe)
-                print(f"[SQL error] intent={expl!r} sql={sql!r} error={sql_error!r}")
+                app.logger.warning("AI SQL failed: intent=%r sql=%r error=%r", expl, sql, sql_error)
 
         # ── STAGE 2: Natural-Language Synthesis ──────────────────────────────
         MAX_ROWS = 80
@@ -485,7 +728,7 @@ Rules:
         elif not rows:
             data_block = "The query returned zero results."
         else:
-            display_rows = rows[:MAX_ROWS]
+            display_rows = [dict(r) for r in rows[:MAX_ROWS]]
             data_block   = json.dumps(display_rows)
             if len(rows) > MAX_ROWS:
                 data_block += f"\n\n[Note: showing first {MAX_ROWS} of {len(rows)} rows]"
@@ -530,7 +773,7 @@ Guidelines:
         return jsonify({"question": question, "answer": answer})
 
     except Exception as e:
-        traceback.print_exc()
+        app.logger.exception("handler %s failed", request.path)
         msg = str(e)
         # Surface Anthropic auth errors clearly
         if "401" in msg or "authentication" in msg.lower() or "api_key" in msg.lower():
@@ -549,8 +792,11 @@ def award_scenarios(rfq_id):
     and identifies which bidder wins.
     """
     try:
+        # One pass over the RFQ's bids: item-level windows give the lowest price
+        # and its bidder, bidder-level windows give each complete-bid total.
         sql = """
             SELECT
+                i.id   AS item_id,
                 i.item_number,
                 i.item_type,
                 i.specification,
@@ -559,56 +805,71 @@ def award_scenarios(rfq_id):
                 i.quantity,
                 b.unit_price,
                 b.ext_price,
-                d.name  AS bidder,
-                b.unit_price = MIN(b.unit_price) OVER (PARTITION BY i.id) AS is_lowest
+                d.name AS bidder,
+                b.unit_price = MIN(b.unit_price) OVER item_w AS is_lowest,
+                MIN(b.unit_price) OVER item_w                AS best_unit_price,
+                MIN(b.unit_price) OVER item_w * i.quantity   AS best_ext_price,
+                FIRST_VALUE(d.name) OVER (
+                    PARTITION BY i.id
+                    ORDER BY b.unit_price IS NULL, b.unit_price, b.id
+                )                                            AS best_bidder,
+                SUM(b.ext_price)   OVER bidder_w             AS total_ext,
+                COUNT(b.ext_price) OVER bidder_w             AS items_bid
             FROM rfq_items i
             JOIN bids b    ON b.item_id  = i.id
             JOIN bidders d ON d.id       = b.bidder_id
             WHERE i.rfq_id = ?
-            ORDER BY CAST(i.item_number AS REAL), i.item_number, b.unit_price
+            WINDOW item_w   AS (PARTITION BY i.id),
+                   bidder_w AS (PARTITION BY d.name)
+            ORDER BY CAST(i.item_number AS REAL), i.item_number, i.id, b.unit_price
         """
-        rows = rfq_db.run_query(sql.replace("?", f"'{rfq_id}'"), DB_PATH)
+        rows = rfq_db.run_query(sql, DB_PATH, (rfq_id,))
 
-        # Lowest complete bid (bidder with lowest total across all items they bid)
-        sql2 = """
-            SELECT d.name AS bidder,
-                   SUM(b.ext_price) AS total_ext,
-                   COUNT(b.id)      AS items_bid
-            FROM bids b
-            JOIN bidders d ON d.id = b.bidder_id
-            JOIN rfq_items i ON i.id = b.item_id
-            WHERE i.rfq_id = ? AND b.ext_price IS NOT NULL
-            GROUP BY d.name
-            ORDER BY total_ext
-        """.replace("?", f"'{rfq_id}'")
-        totals = rfq_db.run_query(sql2, DB_PATH)
-
-        # Lowest unit price per item (best possible award)
-        sql3 = """
-            SELECT i.item_number, i.item_type, i.specification,
-                   MIN(b.unit_price) AS best_unit_price,
-                   d.name            AS best_bidder,
-                   i.quantity,
-                   MIN(b.unit_price) * i.quantity AS best_ext_price
-            FROM rfq_items i
-            JOIN bids b    ON b.item_id = i.id
-            JOIN bidders d ON d.id      = b.bidder_id
-            WHERE i.rfq_id = ? AND b.unit_price IS NOT NULL
-            GROUP BY i.id
-            ORDER BY CAST(i.item_number AS REAL), i.item_number
-        """.replace("?", f"'{rfq_id}'")
-        best_items = rfq_db.run_query(sql3, DB_PATH)
+        all_bids   = []
+        best_items = {}   # lowest unit price per item (best possible award)
+        totals     = {}   # lowest complete bid (total across all items each bidder priced)
+        for r in rows:
+            all_bids.append({
+                "item_number":   r["item_number"],
+                "item_type":     r["item_type"],
+                "specification": r["specification"],
+                "size":          r["size"],
+                "unit":          r["unit"],
+                "quantity":      r["quantity"],
+                "unit_price":    r["unit_price"],
+                "ext_price":     r["ext_price"],
+                "bidder":        r["bidder"],
+                "is_lowest":     r["is_lowest"],
+            })
+            if r["best_unit_price"] is not None and r["item_id"] not in best_items:
+                best_items[r["item_id"]] = {
+                    "item_number":     r["item_number"],
+                    "item_type":       r["item_type"],
+                    "specification":   r["specification"],
+                    "best_unit_price": r["best_unit_price"],
+                    "best_bidder":     r["best_bidder"],
+                    "quantity":        r["quantity"],
+                    "best_ext_price":  r["best_ext_price"],
+                }
+            if r["items_bid"] and r["bidder"] not in totals:
+                totals[r["bidder"]] = {
+                    "bidder":    r["bidder"],
+                    "total_ext": r["total_ext"],
+                    "items_bid": r["items_bid"],
+                }
+        best_items = list(best_items.values())
+        totals     = sorted(totals.values(), key=lambda t: (t["total_ext"], t["bidder"]))
 
         return jsonify({
             "rfq_id":       rfq_id,
-            "all_bids":     rows,
+            "all_bids":     all_bids,
             "bidder_totals": totals,
             "best_by_item": best_items,
             "best_total":   sum(r.get("best_ext_price") or 0 for r in best_items),
         })
 
     except Exception as e:
-        traceback.print_exc()
+        app.logger.exception("handler %s failed", request.path)
         return jsonify({"error": str(e)}), 500
 
 
@@ -616,87 +877,102 @@ def award_scenarios(rfq_id):
 def coefficient_variance(rfq_id):
     """
     Returns price spread stats per item across all bidders.
-    SQLite doesn't have STDDEV, so we compute via a Python post-process.
+    SQLite doesn't have STDDEV, so the query sums each bid's squared
+    deviation from its item's AVG (computed first in a CTE) and the sample
+    stdev is derived from that per item.  Summing deviations rather than
+    raw squares keeps precision when prices are large and close together.
     """
     try:
+        # Prices are concatenated as %.17g text so they round-trip exactly
         sql = """
-            SELECT i.id, i.item_number, i.item_type, i.specification, i.size,
-                   d.name AS bidder, b.unit_price
-            FROM rfq_items i
-            JOIN bids b    ON b.item_id = i.id
-            JOIN bidders d ON d.id      = b.bidder_id
-            WHERE i.rfq_id = ? AND b.unit_price IS NOT NULL AND b.unit_price > 0
+            WITH item_avg AS (
+                SELECT b.item_id, AVG(b.unit_price) AS mean_price
+                FROM bids b
+                JOIN rfq_items i ON i.id = b.item_id
+                WHERE i.rfq_id = ? AND b.unit_price IS NOT NULL AND b.unit_price > 0
+                GROUP BY b.item_id
+            )
+            SELECT i.item_number, i.item_type, i.specification, i.size,
+                   COUNT(*)                                    AS bid_count,
+                   MIN(b.unit_price)                           AS min_price,
+                   MAX(b.unit_price)                           AS max_price,
+                   a.mean_price                                AS mean_price,
+                   SUM((b.unit_price - a.mean_price)
+                       * (b.unit_price - a.mean_price))        AS sq_dev,
+                   json_group_array(d.name)                    AS bidders,
+                   GROUP_CONCAT(printf('%.17g', b.unit_price)) AS prices
+            FROM item_avg a
+            JOIN rfq_items i ON i.id      = a.item_id
+            JOIN bids b      ON b.item_id = i.id
+            JOIN bidders d   ON d.id      = b.bidder_id
+            WHERE b.unit_price IS NOT NULL AND b.unit_price > 0
+            GROUP BY i.id
             ORDER BY i.id
-        """.replace("?", f"'{rfq_id}'")
-        rows = rfq_db.run_query(sql, DB_PATH)
-
-        import statistics
-
-        # Group by item
-        items_map = {}
-        for r in rows:
-            key = r["id"]
-            if key not in items_map:
-                items_map[key] = {
-                    "item_number":   r["item_number"],
-                    "item_type":     r["item_type"],
-                    "specification": r["specification"],
-                    "size":          r["size"],
-                    "prices":        [],
-                    "bidders":       [],
-                }
-            items_map[key]["prices"].append(r["unit_price"])
-            items_map[key]["bidders"].append(r["bidder"])
+        """
+        rows = rfq_db.run_query(sql, DB_PATH, (rfq_id,))
 
         result = []
-        for item in items_map.values():
-            prices = item["prices"]
-            n = len(prices)
+        for r in rows:
+            n    = r["bid_count"]
+            mean = r["mean_price"]
             if n < 2:
                 cv = None
                 stdev = None
             else:
-                mean  = statistics.mean(prices)
-                stdev = statistics.stdev(prices)
+                stdev = math.sqrt(r["sq_dev"] / (n - 1))
                 cv    = (stdev / mean * 100) if mean else None
             result.append({
-                "item_number":   item["item_number"],
-                "item_type":     item["item_type"],
-                "specification": item["specification"],
-                "size":          item["size"],
+                "item_number":   r["item_number"],
+                "item_type":     r["item_type"],
+                "specification": r["specification"],
+                "size":          r["size"],
                 "bid_count":     n,
-                "min_price":     min(prices),
-                "max_price":     max(prices),
-                "mean_price":    round(statistics.mean(prices), 4) if prices else None,
+                "min_price":     r["min_price"],
+                "max_price":     r["max_price"],
+                "mean_price":    round(mean, 4),
                 "stdev":         round(stdev, 4) if stdev is not None else None,
                 "cv_pct":        round(cv, 1) if cv is not None else None,
-                "bidders":       item["bidders"],
-                "prices":        prices,
+                "bidders":       json.loads(r["bidders"]),
+                "prices":        [float(p) for p in r["prices"].split(",")],
             })
 
         result.sort(key=lambda x: (x["cv_pct"] or 0), reverse=True)
         return jsonify({"rfq_id": rfq_id, "items": result})
 
     except Exception as e:
-        traceback.print_exc()
+        app.logger.exception("handler %s failed", request.path)
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/analysis/price-trends", methods=["GET"])
 def price_trends():
     """
-    GET params: item_type (optional), description_like (optional)
+    GET params: item_type (optional), description_like (optional), stream (optional)
     Returns average unit_price per item_type per RFQ over time.
+    With stream=1 the rows are sent as NDJSON (one object per line) straight
+    off the cursor instead of being collected into a single JSON array.
     """
     try:
         item_type = request.args.get("item_type", "")
         desc_like = request.args.get("description_like", "")
 
         where_clauses = ["b.unit_price IS NOT NULL", "b.unit_price > 0", "r.is_potential = 0"]
+        params = []
+        match_join = ""
         if item_type:
-            where_clauses.append(f"i.item_type = '{item_type.upper()}'")
+            where_clauses.append("i.item_type = ?")
+            params.append(item_type.upper())
         if desc_like:
-            where_clauses.append(f"(i.specification LIKE '%{desc_like}%' OR i.item_type LIKE '%{desc_like}%')")
+            # Trigram MATCH needs at least 3 characters, and LIKE wildcards in
+            # the filter keep their LIKE meaning, so those cases stay on LIKE.
+            if (len(desc_like) >= 3 and not any(c in desc_like for c in "%_")
+                    and rfq_db.has_fts(DB_PATH)):
+                match_join = "JOIN rfq_items_fts fts ON fts.rowid = i.id"
+                where_clauses.append("rfq_items_fts MATCH ?")
+                params.append('"' + desc_like.replace('"', '""') + '"')
+            else:
+                where_clauses.append("(i.specification LIKE ? OR i.item_type LIKE ?)")
+                params += [f"%{desc_like}%"] * 2
 
         where = " AND ".join(where_clauses)
         sql = f"""
@@ -707,17 +983,27 @@ def price_trends():
                    b.ext_price,
                    i.quantity
             FROM rfq_items i
+            {match_join}
             JOIN rfqs    r ON r.rfq_id  = i.rfq_id
             JOIN bids    b ON b.item_id = i.id
             JOIN bidders d ON d.id      = b.bidder_id
             WHERE {where}
             ORDER BY r.rfq_date, i.item_type, i.specification
         """
-        rows = rfq_db.run_query(sql, DB_PATH)
+        if request.args.get("stream") == "1":
+            rows = rfq_db.iter_query(sql, DB_PATH, params)
+
+            def ndjson():
+                for r in rows:
+                    yield orjson.dumps(dict(r), option=orjson.OPT_APPEND_NEWLINE)
+
+            return Response(stream_with_context(ndjson()), mimetype="application/x-ndjson")
+
+        rows = rfq_db.run_query(sql, DB_PATH, params)
         return jsonify({"rows": rows, "count": len(rows)})
 
     except Exception as e:
-        traceback.print_exc()
+        app.logger.exception("handler %s failed", request.path)
         return jsonify({"error": str(e)}), 500
 
 
@@ -745,7 +1031,7 @@ def bidder_patterns():
         return jsonify({"rows": rows})
 
     except Exception as e:
-        traceback.print_exc()
+        app.logger.exception("handler %s failed", request.path)
         return jsonify({"error": str(e)}), 500
 
 
@@ -753,6 +1039,43 @@ def bidder_patterns():
 # /api/analysis/subset-enum/<rfq_id>  — split-award subset optimisation
 # ---------------------------------------------------------------------------
 
+# Upper bound on cells in one block of per-item subset tables (~32 MB of float64)
+_SUBSET_BLOCK_CELLS = 1 << 22
+
+
+def _subset_totals(cost):
+    """
+    Evaluate every bidder subset in one sweep.
+
+    cost is an (n_items, n_bidders) array of item costs, np.inf where the
+    bidder did not quote.  Subsets are bitmasks where bit b selects bidder
+    column n_bidders-1-b, so walking masks in descending order visits each
+    subset size in the same order as itertools.combinations.
+
+    Returns (total, covered) arrays indexed by mask: the summed cheapest cost
+    of the items the subset can cover, and how many items that is.
+    """
+    # Items nobody quoted add nothing to any subset; leave them out of the sweep
+    cost = cost[np.isfinite(cost).any(axis=1)]
+    n_items, n = cost.shape
+    total   = np.zeros(1 << n)
+    covered = np.zeros(1 << n, dtype=np.int64)
+    block   = max(1, _SUBSET_BLOCK_CELLS >> n)
+    for start in range(0, n_items, block):
+        rows = cost[start:start + block]
+        # cheapest[i, mask] = min cost of item i among bidders in mask.  Built
+        # by doubling: the masks with bit b set are the masks below it plus
+        # bidder b.  Whole blocks of items go through each step together.
+        cheapest = np.full((len(rows), 1), np.inf)
+        for b in range(n):
+            col = rows[:, n - 1 - b:n - b]
+            cheapest = np.concatenate((cheapest, np.minimum(cheapest, col)), axis=1)
+        quoted   = np.isfinite(cheapest)
+        total   += np.where(quoted, cheapest, 0.0).sum(axis=0)
+        covered += quoted.sum(axis=0)
+    return total, covered
+
+
 @app.route("/api/analysis/subset-enum/<rfq_id>", methods=["GET"])
 def subset_enum(rfq_id):
     """
@@ -762,15 +1085,13 @@ def subset_enum(rfq_id):
     plus a savings-vs-k=1 column so you can see the diminishing-returns curve.
     """
     try:
-        from itertools import combinations
-
         # ── 1. Load all items for this RFQ ──────────────────────────────────
         items_sql = """
             SELECT id, item_number, item_type, specification, size, unit, quantity
             FROM rfq_items WHERE rfq_id = ?
             ORDER BY CAST(item_number AS REAL), item_number
-        """.replace("?", f"'{rfq_id}'")
-        items = rfq_db.run_query(items_sql, DB_PATH)
+        """
+        items = rfq_db.run_query(items_sql, DB_PATH, (rfq_id,))
         if not items:
             return jsonify({"error": f"No items found for RFQ '{rfq_id}'"}), 404
 
@@ -783,59 +1104,46 @@ def subset_enum(rfq_id):
             JOIN rfq_items i ON i.id     = b.item_id
             WHERE i.rfq_id = ?
               AND (b.unit_price IS NOT NULL OR b.ext_price IS NOT NULL)
-        """.replace("?", f"'{rfq_id}'")
-        bids = rfq_db.run_query(bids_sql, DB_PATH)
+        """
+        bids = rfq_db.run_query(bids_sql, DB_PATH, (rfq_id,))
+
+        all_bidders = sorted({b["bidder"] for b in bids})
+        n = len(all_bidders)
+        item_ids = [it["id"] for it in items]
 
-        # ── 3. Build lookup: item_id → {bidder: effective_cost} ─────────────
+        # ── 3. Build cost matrix: [item row, bidder column] → effective_cost ─
         #       effective_cost = ext_price if available, else unit_price * qty
-        item_costs = {}   # {item_id: {bidder: cost}}
+        #       np.inf where the bidder did not quote the item
+        bidder_col  = {bd: j for j, bd in enumerate(all_bidders)}
+        item_row    = {iid: r for r, iid in enumerate(item_ids)}
+        cost_matrix = np.full((len(item_ids), n), np.inf)
         for b in bids:
-            iid = b["item_id"]
-            if iid not in item_costs:
-                item_costs[iid] = {}
             cost = b["ext_price"]
             if cost is None and b["unit_price"] is not None:
                 qty = b["quantity"] or 1
                 cost = b["unit_price"] * qty
             if cost is not None and cost >= 0:
-                item_costs[iid][b["bidder"]] = cost
+                cost_matrix[item_row[b["item_id"]], bidder_col[b["bidder"]]] = cost
 
-        all_bidders = sorted({b["bidder"] for b in bids})
-        n = len(all_bidders)
-        item_ids = [it["id"] for it in items]
+        # ── 4. Evaluate every subset at once, then pick the best per size k ──
+        total, covered = _subset_totals(cost_matrix)
 
-        # ── 4. Enumerate every subset size k ─────────────────────────────────
-        def eval_subset(bidder_set):
-            """Return (total_cost, covered_count, uncovered_ids) for a bidder subset."""
-            total = 0.0
-            covered = 0
-            uncovered = []
-            for iid in item_ids:
-                costs_here = {bd: item_costs[iid][bd]
-                              for bd in bidder_set if iid in item_costs and bd in item_costs[iid]}
-                if costs_here:
-                    total += min(costs_here.values())
-                    covered += 1
-                else:
-                    uncovered.append(iid)
-            return total, covered, uncovered
+        masks = np.arange(1 << n)[::-1]       # descending = combinations() order
+        popcount = np.zeros(1 << n, dtype=np.int64)
+        for b in range(n):
+            popcount[1 << b:2 << b] = popcount[:1 << b] + 1
+        popcount = popcount[masks]
 
         results = []
         baseline_cost = None   # cost for k=1 best single bidder
 
         for k in range(1, n + 1):
-            best_cost     = None
-            best_subset   = None
-            best_covered  = 0
-            best_uncovered = []
-
-            for combo in combinations(all_bidders, k):
-                cost, covered, uncovered = eval_subset(set(combo))
-                if best_cost is None or cost < best_cost:
-                    best_cost      = cost
-                    best_subset    = list(combo)
-                    best_covered   = covered
-                    best_uncovered = uncovered
+            size_k = masks[popcount == k]
+            mask   = int(size_k[np.argmin(total[size_k])])
+
+            best_cost    = float(total[mask])
+            best_subset  = [bd for j, bd in enumerate(all_bidders) if mask >> (n - 1 - j) & 1]
+            best_covered = int(covered[mask])
 
             if k == 1:
                 baseline_cost = best_cost
@@ -849,20 +1157,23 @@ def subset_enum(rfq_id):
                     (results[-1]["total_cost"] - best_cost) / results[-1]["total_cost"] * 100, 2
                 )
 
-            # Per-item breakdown for this best subset
+            # Per-item breakdown for this best subset, read off the cost
+            # matrix columns of its bidders (inf = no quote)
+            sub      = cost_matrix[:, [bidder_col[bd] for bd in best_subset]]
+            win_col  = sub.argmin(axis=1).tolist()
+            quoted   = np.isfinite(sub).tolist()
+            sub      = sub.tolist()
             per_item = []
-            for it in items:
-                iid = it["id"]
-                costs_here = {bd: item_costs[iid][bd]
-                              for bd in best_subset if iid in item_costs and bd in item_costs[iid]}
-                if costs_here:
-                    winner     = min(costs_here, key=costs_here.get)
-                    win_cost   = costs_here[winner]
-                    all_quoted = {bd: round(costs_here[bd], 4) for bd in costs_here}
+            for row_i, it in enumerate(items):
+                row = sub[row_i]
+                all_quoted = {bd: round(row[j], 4)
+                              for j, bd in enumerate(best_subset) if quoted[row_i][j]}
+                if all_quoted:
+                    winner   = best_subset[win_col[row_i]]
+                    win_cost = row[win_col[row_i]]
                 else:
-                    winner     = None
-                    win_cost   = None
-                    all_quoted = {}
+                    winner   = None
+                    win_cost = None
                 per_item.append({
                     "item_number":   it["item_number"],
                     "item_type":     it["item_type"],
@@ -882,7 +1193,7 @@ def subset_enum(rfq_id):
                 "total_cost":         round(best_cost, 2) if best_cost is not None else None,
                 "items_covered":      best_covered,
                 "items_total":        len(item_ids),
-                "uncovered_count":    len(best_uncovered),
+                "uncovered_count":    len(item_ids) - best_covered,
                 "savings_vs_k1_pct":  savings_vs_single,
                 "savings_vs_prev_pct": savings_vs_prev,
                 "per_item":           per_item,
@@ -896,7 +1207,7 @@ def subset_enum(rfq_id):
         })
 
     except Exception as e:
-        traceback.print_exc()
+        app.logger.exception("handler %s failed", request.path)
         return jsonify({"error": str(e)}), 500
 
 
@@ -904,6 +1215,12 @@ def subset_enum(rfq_id):
 # /api/analysis/estimate/<rfq_id>  — historical price estimation
 # ---------------------------------------------------------------------------
 
+# Runs of 2+ characters between separators (whitespace , / ( ) -) — the same
+# tokens as splitting on the separators and dropping 0/1-char pieces
+_SPEC_TOKENS = re.compile(r"[^\s,/()\-]{2,}").findall
+_SPEC_SKIP  = frozenset({"AND", "OR", "THE", "TO", "OF", "IN", "WITH"})
+
+
 def _tokenise_spec(spec):
     """
     Split a specification string into a normalised set of meaningful tokens.
@@ -911,20 +1228,43 @@ def _tokenise_spec(spec):
       -> {"SMLS","NPS","2","SCH","XS","80","0.218","WT","BARE","ASTM","A106","B"}
     """
     if not spec:
-        return set()
-    import re
-    tokens = re.split(r"[\s,/\(\)\-]+", str(spec).upper())
-    # Drop tokens that are too short or purely punctuation
-    skip = {"AND", "OR", "THE", "TO", "OF", "IN", "WITH"}
-    return {t for t in tokens if len(t) >= 2 and t not in skip}
-
-
-def _jaccard(a, b):
-    if not a or not b:
+        return frozenset()
+    # Tokens repeat across thousands of specs; interning makes them shared
+    # objects, so set lookups on the intersection path hit the identity fast path.
+    return frozenset(sys.intern(t) for t in _SPEC_TOKENS(str(spec).upper())
+                     if t not in _SPEC_SKIP)
+
+
+def _jaccard(a, b, la=None, lb=None):
+    """Jaccard similarity; la/lb are len(a)/len(b) when the caller already has them."""
+    # isdisjoint stops at the first shared token and builds nothing, so the
+    # common no-overlap pair never allocates an intersection set
+    if not a or not b or a.isdisjoint(b):
         return 0.0
     inter = len(a & b)
-    union = len(a | b)
-    return inter / union if union else 0.0
+    # |A ∪ B| = |A| + |B| - |A ∩ B|, without building the union set
+    return inter / ((la or len(a)) + (lb or len(b)) - inter)
+
+
+def _empty_estimate(titem):
+    """Estimate row for a target item with no usable historical match."""
+    return {
+        "item_number":   titem["item_number"],
+        "item_type":     titem["item_type"],
+        "specification": titem["specification"] or "",
+        "size":          titem["size"],
+        "unit":          titem["unit"],
+        "quantity":      titem["quantity"],
+        "confidence":    "NONE",
+        "match_score":   0,
+        "matches":       [],
+        "est_unit_min":  None,
+        "est_unit_mean": None,
+        "est_unit_max":  None,
+        "est_ext_mean":  None,
+        "bidders_seen":  [],
+        "source_rfqs":   [],
+    }
 
 
 @app.route("/api/analysis/estimate/<rfq_id>", methods=["GET"])
@@ -942,143 +1282,172 @@ def estimate_rfq(rfq_id):
     Returns per-item estimates plus an overall RFQ cost estimate.
     """
     try:
-        # ── 1. Verify this RFQ exists (ideally is_potential=1, but allow either) ──
-        rfq_rows = rfq_db.run_query(
-            f"SELECT * FROM rfqs WHERE rfq_id = '{rfq_id}'", DB_PATH
-        )
-        if not rfq_rows:
-            return jsonify({"error": f"RFQ '{rfq_id}' not found"}), 404
-
-        # ── 2. Load items for the target RFQ ─────────────────────────────────
-        target_items = rfq_db.run_query(
-            f"""SELECT id, item_number, item_type, specification, size, unit, quantity
-                FROM rfq_items WHERE rfq_id = '{rfq_id}'
-                ORDER BY CAST(item_number AS REAL), item_number""",
-            DB_PATH
-        )
-        if not target_items:
-            return jsonify({"error": f"No items found for RFQ '{rfq_id}'"}), 404
-
-        # ── 3. Load all historical bid data (exclude this RFQ, exclude potential) ──
-        hist_bids = rfq_db.run_query(
-            f"""SELECT i.id        AS item_id,
-                       i.item_type,
-                       i.specification,
-                       i.size,
-                       i.unit,
-                       i.quantity,
-                       r.rfq_id,
-                       r.rfq_date,
-                       r.station,
-                       d.name      AS bidder,
-                       b.unit_price,
-                       b.ext_price
-                FROM rfq_items  i
-                JOIN rfqs        r ON r.rfq_id     = i.rfq_id
-                JOIN bids        b ON b.item_id    = i.id
-                JOIN bidders     d ON d.id          = b.bidder_id
-                WHERE r.rfq_id      != '{rfq_id}'
-                  AND r.is_potential = 0
-                  AND b.unit_price  IS NOT NULL
-                  AND b.unit_price   > 0""",
-            DB_PATH
-        )
+        # Steps 1-3 read one consistent snapshot on a single connection
+        with rfq_db.read_transaction(DB_PATH):
+            # ── 1. Verify this RFQ exists (ideally is_potential=1, but allow either) ──
+            rfq_rows = rfq_db.run_query(
+                "SELECT * FROM rfqs WHERE rfq_id = ?", DB_PATH, (rfq_id,)
+            )
+            if not rfq_rows:
+                return jsonify({"error": f"RFQ '{rfq_id}' not found"}), 404
+
+            # ── 2. Load items for the target RFQ ─────────────────────────────────
+            target_items = rfq_db.run_query(
+                """SELECT id, item_number, item_type, specification, size, unit, quantity
+                    FROM rfq_items WHERE rfq_id = ?
+                    ORDER BY CAST(item_number AS REAL), item_number""",
+                DB_PATH, (rfq_id,)
+            )
+            if not target_items:
+                return jsonify({"error": f"No items found for RFQ '{rfq_id}'"}), 404
+
+            # ── 3. Load historical bid data for the item types in this RFQ ──────
+            #       (exclude this RFQ, exclude potential).  Types are bound as a
+            #       list so idx_items_type drives the join; NULL needs its own test.
+            ttypes     = sorted({t["item_type"] for t in target_items} - {None})
+            type_tests = []
+            if ttypes:
+                type_tests.append(f"i.item_type IN ({','.join('?' * len(ttypes))})")
+            if any(t["item_type"] is None for t in target_items):
+                type_tests.append("i.item_type IS NULL")
+            hist_bids = rfq_db.iter_query(
+                f"""SELECT i.id        AS item_id,
+                           i.item_type,
+                           i.specification,
+                           i.size,
+                           i.unit,
+                           i.quantity,
+                           r.rfq_id,
+                           r.rfq_date,
+                           r.station,
+                           d.name      AS bidder,
+                           b.unit_price,
+                           b.ext_price
+                    FROM rfq_items  i
+                    JOIN rfqs        r ON r.rfq_id     = i.rfq_id
+                    JOIN bids        b ON b.item_id    = i.id
+                    JOIN bidders     d ON d.id          = b.bidder_id
+                    WHERE r.rfq_id      != ?
+                      AND r.is_potential = 0
+                      AND b.unit_price  IS NOT NULL
+                      AND b.unit_price   > 0
+                      AND ({" OR ".join(type_tests)})
+                    ORDER BY b.id""",
+                DB_PATH, (rfq_id, *ttypes)
+            )
+
+            # Group historical bids by item_type as they stream off the cursor
+            # (sqlite3.Row, no per-row dict), tokenising each distinct spec and
+            # normalising each size once rather than per target.  A later row
+            # repeating (rfq, bidder, spec, size) scores exactly like the first
+            # for every target and always loses to it in the dedup below, so
+            # it is dropped here.
+            hist_by_type = {}   # {item_type: [(n_tokens, seq, bid_row, spec_tokens, size)…]}
+            spec_tokens  = {}   # {specification: token set}
+            seen_rows    = set()
+            for seq, row in enumerate(hist_bids):
+                size = (row["size"] or "").strip().upper()
+                key  = (row["item_type"], row["rfq_id"], row["bidder"], row["specification"], size)
+                if key in seen_rows:
+                    continue
+                seen_rows.add(key)
+                spec = row["specification"] or ""
+                toks = spec_tokens.get(spec)
+                if toks is None:
+                    toks = spec_tokens[spec] = _tokenise_spec(spec)
+                hist_by_type.setdefault(row["item_type"], []).append(
+                    (len(toks), seq, row, toks, size)
+                )
 
-        # Group historical bids by item_id for fast lookup
-        hist_by_type = {}   # {item_type: [bid_rows…]}
-        for row in hist_bids:
-            hist_by_type.setdefault(row["item_type"], []).append(row)
+        # Order each type's candidates by token count so a target only walks
+        # the band of lengths that can reach the 0.25 cutoff (see below); seq
+        # keeps the load order for breaking score ties.
+        hist_lens = {}      # {item_type: [n_tokens…]} parallel to hist_by_type
+        for ttype, cands in hist_by_type.items():
+            cands.sort(key=lambda c: (c[0], c[1]))
+            hist_lens[ttype] = [c[0] for c in cands]
 
         # ── 4. Match and estimate each target item ───────────────────────────
         estimates = []
         total_low = total_mean = total_high = 0.0
-        uncovered = 0
+        conf_dist = {"HIGH": 0, "MEDIUM": 0, "LOW": 0, "NONE": 0}   # tallied as we go
+        jac_cache = {}   # {(target tokens, candidate tokens): Jaccard}
 
         for titem in target_items:
             ttype  = titem["item_type"]
             tspec  = titem["specification"] or ""
             tsize  = (titem["size"] or "").strip().upper()
             ttoks  = _tokenise_spec(tspec)
+            tlen   = len(ttoks)
 
             candidates = hist_by_type.get(ttype, [])
             if not candidates:
-                estimates.append({
-                    "item_number":   titem["item_number"],
-                    "item_type":     ttype,
-                    "specification": tspec,
-                    "size":          titem["size"],
-                    "unit":          titem["unit"],
-                    "quantity":      titem["quantity"],
-                    "confidence":    "NONE",
-                    "match_score":   0,
-                    "matches":       [],
-                    "est_unit_min":  None,
-                    "est_unit_mean": None,
-                    "est_unit_max":  None,
-                    "est_ext_mean":  None,
-                    "bidders_seen":  [],
-                    "source_rfqs":   [],
-                })
-                uncovered += 1
+                estimates.append(_empty_estimate(titem))
+                conf_dist["NONE"] += 1
                 continue
 
-            # Score every candidate bid row
+            # Score every candidate bid row that can make the cutoff.
+            # Length filter: Jaccard <= min(len)/max(len), so a candidate whose
+            # token count is off by more than 4x (20x when the +0.20 size bonus
+            # applies) cannot reach 0.25.  The 20x band is cut out of the
+            # length-sorted list by bisection; the 4x test is per candidate.
+            lens = hist_lens[ttype]
+            lo   = bisect.bisect_left(lens, -(-tlen // 20))
+            hi   = bisect.bisect_right(lens, tlen * 20)
             scored = []
-            for c in candidates:
-                ctoks = _tokenise_spec(c["specification"] or "")
-                score = _jaccard(ttoks, ctoks)
+            for clen, seq, c, ctoks, csize in candidates[lo:hi]:
+                size_match = bool(tsize) and tsize == csize
+                if not size_match and (clen * 4 < tlen or tlen * 4 < clen):
+                    continue
+                # Many rows (and target items) share a spec: score each
+                # distinct pair of token sets once
+                pair  = (ttoks, ctoks)
+                score = jac_cache.get(pair)
+                if score is None:
+                    score = jac_cache[pair] = _jaccard(ttoks, ctoks, tlen, clen)
                 # Size match bonus
-                csize = (c["size"] or "").strip().upper()
-                if tsize and csize and tsize == csize:
+                if size_match:
                     score = min(1.0, score + 0.20)
                 if score >= 0.25:
-                    scored.append((score, c))
+                    scored.append((score, seq, c))
 
             if not scored:
-                estimates.append({
-                    "item_number":   titem["item_number"],
-                    "item_type":     ttype,
-                    "specification": tspec,
-                    "size":          titem["size"],
-                    "unit":          titem["unit"],
-                    "quantity":      titem["quantity"],
-                    "confidence":    "NONE",
-                    "match_score":   0,
-                    "matches":       [],
-                    "est_unit_min":  None,
-                    "est_unit_mean": None,
-                    "est_unit_max":  None,
-                    "est_ext_mean":  None,
-                    "bidders_seen":  [],
-                    "source_rfqs":   [],
-                })
-                uncovered += 1
+                estimates.append(_empty_estimate(titem))
+                conf_dist["NONE"] += 1
                 continue
 
             # Weight prices by match score, collect stats
-            scored.sort(key=lambda x: x[0], reverse=True)
+            # Best first; equal scores keep load order, as before the band walk
+            scored.sort(key=lambda x: (-x[0], x[1]))
             best_score  = scored[0][0]
             confidence  = "HIGH" if best_score >= 0.55 else \
                           "MEDIUM" if best_score >= 0.30 else "LOW"
 
-            # Gather unit prices from all scored matches (weighted by score)
-            prices_weighted = []  # [(unit_price, weight)]
-            prices_raw      = []
-            bidders_seen    = set()
-            source_rfqs     = set()
+            # Gather unit prices from all scored matches (weighted by score),
+            # accumulating the weighted sum and min/max in the same pass
+            total_w = wsum = 0.0
+            up_min  = up_max = None
+            bidders_seen    = {}     # insertion-ordered sets; sorted once on emit
+            source_rfqs     = {}
             match_detail    = []
 
-            seen_keys = set()  # deduplicate (rfq_id, bidder, spec) combos
-            for score, c in scored:
+            # deduplicate (rfq_id, bidder, spec) combos; rows left after the
+            # grouping pass differ only in size, so the best-scoring one wins
+            seen_keys = set()
+            for score, _, c in scored:
                 key = (c["rfq_id"], c["bidder"], c["specification"])
                 if key in seen_keys:
                     continue
                 seen_keys.add(key)
                 up = c["unit_price"]
-                prices_weighted.append((up, score))
-                prices_raw.append(up)
-                bidders_seen.add(c["bidder"])
-                source_rfqs.add(c["rfq_id"])
+                total_w += score
+                wsum    += up * score
+                if up_min is None or up < up_min:
+                    up_min = up
+                if up_max is None or up > up_max:
+                    up_max = up
+                bidders_seen[c["bidder"]] = None
+                source_rfqs[c["rfq_id"]]  = None
                 match_detail.append({
                     "rfq_id":        c["rfq_id"],
                     "rfq_date":      c["rfq_date"],
@@ -1089,18 +1458,17 @@ def estimate_rfq(rfq_id):
                     "match_score":   round(score, 3),
                 })
 
-            if not prices_raw:
-                uncovered += 1
+            if up_min is None:
+                conf_dist["NONE"] += 1
                 continue
 
             # Weighted mean price
-            total_w  = sum(w for _, w in prices_weighted)
-            wmean    = sum(p * w for p, w in prices_weighted) / total_w
+            wmean    = wsum / total_w
             qty      = titem["quantity"] or 0
 
-            est_min  = round(min(prices_raw), 4)
+            est_min  = round(up_min, 4)
             est_mean = round(wmean, 4)
-            est_max  = round(max(prices_raw), 4)
+            est_max  = round(up_max, 4)
             est_ext  = round(wmean * qty, 2) if qty else None
 
             total_low  += est_min  * qty
@@ -1124,14 +1492,10 @@ def estimate_rfq(rfq_id):
                 "bidders_seen":  sorted(bidders_seen),
                 "source_rfqs":   sorted(source_rfqs),
             })
+            conf_dist[confidence] += 1
 
+        uncovered = conf_dist["NONE"]
         covered   = len(estimates) - uncovered
-        conf_dist = {
-            "HIGH":   sum(1 for e in estimates if e["confidence"] == "HIGH"),
-            "MEDIUM": sum(1 for e in estimates if e["confidence"] == "MEDIUM"),
-            "LOW":    sum(1 for e in estimates if e["confidence"] == "LOW"),
-            "NONE":   uncovered,
-        }
 
         return jsonify({
             "rfq_id":        rfq_id,
@@ -1146,7 +1510,7 @@ def estimate_rfq(rfq_id):
         })
 
     except Exception as e:
-        traceback.print_exc()
+        app.logger.exception("handler %s failed", request.path)
         return jsonify({"error": str(e)}), 500
 
 
@@ -1157,11 +1521,10 @@ def estimate_rfq(rfq_id):
 @app.route("/api/files", methods=["GET"])
 def list_files():
     try:
-        files = []
-        for p in BASE_DIR.glob("*.xlsx"):
-            files.append({"name": p.name, "path": str(p), "size": p.stat().st_size})
-        for p in BASE_DIR.glob("*.xls"):
-            files.append({"name": p.name, "path": str(p), "size": p.stat().st_size})
+        # One directory read; DirEntry caches the stat result
+        with os.scandir(BASE_DIR) as it:
+            files = [{"name": e.name, "path": e.path, "size": e.stat().st_size}
+                     for e in it if e.name.lower().endswith((".xlsx", ".xls")) and e.is_file()]
         files.sort(key=lambda f: f["name"])
         return jsonify(files)
     except Exception as e:
@@ -11,6 +11,8 @@ bids          — one row per (item, bidder) pair
 
 import sqlite3
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 
 # Default DB path sits next to this script
@@ -22,14 +24,88 @@ _DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rfq_data
 # ---------------------------------------------------------------------------
 
 def get_conn(db_path=None):
+    """Open a fresh connection. Used for writes; callers close it when done."""
     path = db_path or _DEFAULT_DB
     conn = sqlite3.connect(path)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON")
-    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")     # journal_mode=WAL persists; set in init_db
     return conn
 
 
+_local = threading.local()
+
+# Authorizer actions a read connection may compile: plain queries, function
+# calls and the BEGIN/COMMIT of read_transaction.  Everything else (writes,
+# DDL, PRAGMA, ATTACH) fails to prepare, and unlike query_only the SQL run
+# through the connection cannot switch this off.
+_READ_ACTIONS = frozenset({
+    sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION,
+    sqlite3.SQLITE_RECURSIVE, sqlite3.SQLITE_TRANSACTION,
+})
+_SCHEMA_TABLES = frozenset({"sqlite_master", "sqlite_schema"})
+
+
+def _read_only_authorizer(action, arg1, arg2, db_name, source):
+    if action in _READ_ACTIONS:
+        return sqlite3.SQLITE_OK
+    # Opening the FTS5 table declares its schema (reported as an UPDATE of
+    # sqlite_master) and reads PRAGMA data_version.  SQLite itself refuses
+    # real sqlite_master writes while writable_schema is off, and no PRAGMA
+    # that could turn it on gets past this function.
+    if action == sqlite3.SQLITE_UPDATE and arg1 in _SCHEMA_TABLES:
+        return sqlite3.SQLITE_OK
+    if action == sqlite3.SQLITE_PRAGMA and arg1 == "data_version" and arg2 is None:
+        return sqlite3.SQLITE_OK
+    return sqlite3.SQLITE_DENY
+
+
+def _read_conn(db_path=None):
+    """
+    Return this thread's long-lived read connection for db_path.
+
+    Opened once per worker thread and reused, so read helpers skip the
+    connect + PRAGMA cost and keep a warm page cache.  It runs in autocommit
+    mode (no read transaction is held open between calls), and an authorizer
+    rejects any statement other than a read, so nothing executed through it
+    can modify the database or its connection settings.  Do not close it.
+    """
+    path  = db_path or _DEFAULT_DB
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA cache_size = -65536")     # 64 MB
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA mmap_size = 268435456")   # 256 MB
+        conn.execute("PRAGMA query_only = ON")
+        conn.set_authorizer(_read_only_authorizer)     # last: the PRAGMAs above are denied from here on
+        conns[path] = conn
+    return conn
+
+
+@contextmanager
+def read_transaction(db_path=None):
+    """
+    Run the read helpers inside one transaction on this thread's read
+    connection, so several queries see the same snapshot and share the
+    statement setup.  Nested use joins the outer transaction.
+    """
+    conn = _read_conn(db_path)
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        conn.execute("COMMIT")
+
+
 # ---------------------------------------------------------------------------
 # Schema creation
 # ---------------------------------------------------------------------------
@@ -47,6 +123,7 @@ CREATE TABLE IF NOT EXISTS rfqs (
     notes        TEXT,
     loaded_at    TEXT    DEFAULT (datetime('now'))
 );
+CREATE INDEX IF NOT EXISTS idx_rfqs_potential ON rfqs(is_potential, rfq_id);
 
 CREATE TABLE IF NOT EXISTS rfq_items (
     id            INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -60,6 +137,7 @@ CREATE TABLE IF NOT EXISTS rfq_items (
 );
 CREATE INDEX IF NOT EXISTS idx_items_rfq    ON rfq_items(rfq_id);
 CREATE INDEX IF NOT EXISTS idx_items_type   ON rfq_items(item_type);
+CREATE INDEX IF NOT EXISTS idx_items_type_rfq ON rfq_items(item_type, rfq_id);   -- estimate history
 
 CREATE TABLE IF NOT EXISTS bidders (
     id   INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -79,18 +157,74 @@ CREATE INDEX IF NOT EXISTS idx_bids_bidder  ON bids(bidder_id);
 CREATE INDEX IF NOT EXISTS idx_bids_item    ON bids(item_id);
 """
 
+# Trigram full-text index over the item text columns, kept in step with
+# rfq_items by triggers.  Trigram MATCH is a case-insensitive substring search,
+# so it can stand in for LIKE '%...%' without the full table scan.
+FTS_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS rfq_items_fts USING fts5(
+    specification, item_type,
+    content='rfq_items', content_rowid='id', tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS rfq_items_fts_ai AFTER INSERT ON rfq_items BEGIN
+    INSERT INTO rfq_items_fts(rowid, specification, item_type)
+    VALUES (new.id, new.specification, new.item_type);
+END;
+CREATE TRIGGER IF NOT EXISTS rfq_items_fts_ad AFTER DELETE ON rfq_items BEGIN
+    INSERT INTO rfq_items_fts(rfq_items_fts, rowid, specification, item_type)
+    VALUES ('delete', old.id, old.specification, old.item_type);
+END;
+CREATE TRIGGER IF NOT EXISTS rfq_items_fts_au AFTER UPDATE ON rfq_items BEGIN
+    INSERT INTO rfq_items_fts(rfq_items_fts, rowid, specification, item_type)
+    VALUES ('delete', old.id, old.specification, old.item_type);
+    INSERT INTO rfq_items_fts(rowid, specification, item_type)
+    VALUES (new.id, new.specification, new.item_type);
+END;
+"""
+
+
+_initialized = set()     # databases init_db has already run against
+
 
 def init_db(db_path=None):
-    """Create all tables if they don't exist yet."""
+    """Create all tables if they don't exist yet. Runs once per database per process."""
+    path = os.path.abspath(db_path or _DEFAULT_DB)
+    if path in _initialized and os.path.exists(path):
+        return
     conn = get_conn(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")       # persistent; once per database
     conn.executescript(DDL)
     # Migrate: add project column to existing databases that pre-date this field
-    try:
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(rfqs)")}
+    if "project" not in cols:
         conn.execute("ALTER TABLE rfqs ADD COLUMN project TEXT")
         conn.commit()
-    except Exception:
-        pass  # Column already exists
+    # Full-text index: needs an FTS5 build of SQLite, so it is optional.
+    # Backfill from rfq_items the first time the table appears.
+    try:
+        is_new = not has_fts(db_path, conn)
+        conn.executescript(FTS_DDL)
+        if is_new:
+            conn.execute("INSERT INTO rfq_items_fts(rfq_items_fts) VALUES ('rebuild')")
+        conn.commit()
+    except sqlite3.OperationalError:
+        pass  # No FTS5 / trigram tokenizer — callers fall back to LIKE
+    # Refresh planner statistics so the indexes above get picked; the limit
+    # keeps this a sampled pass even on a large database.
+    conn.execute("PRAGMA analysis_limit = 1000")
+    conn.execute("ANALYZE")
+    conn.commit()
     conn.close()
+    _initialized.add(path)
+
+
+def has_fts(db_path=None, conn=None):
+    """True if the rfq_items_fts index exists in this database."""
+    conn = conn or _read_conn(db_path)
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='rfq_items_fts'"
+    ).fetchone()
+    return row is not None
 
 
 # ---------------------------------------------------------------------------
@@ -98,9 +232,8 @@ def init_db(db_path=None):
 # ---------------------------------------------------------------------------
 
 def rfq_exists(rfq_id, db_path=None):
-    conn = get_conn(db_path)
+    conn = _read_conn(db_path)
     row = conn.execute("SELECT 1 FROM rfqs WHERE rfq_id=?", (rfq_id,)).fetchone()
-    conn.close()
     return row is not None
 
 
@@ -127,7 +260,7 @@ def insert_rfq(rfq_id, creator, station, project, rfq_date, source_file, sheet_n
 
 
 def get_all_rfqs(db_path=None):
-    conn = get_conn(db_path)
+    conn = _read_conn(db_path)
     rows = conn.execute(
         """SELECT r.rfq_id, r.creator, r.station, r.project, r.rfq_date,
                   r.source_file, r.sheet_name, r.is_potential, r.loaded_at,
@@ -139,15 +272,13 @@ def get_all_rfqs(db_path=None):
            GROUP BY r.rfq_id
            ORDER BY r.rfq_date DESC, r.loaded_at DESC"""
     ).fetchall()
-    conn.close()
     return [dict(r) for r in rows]
 
 
 def get_rfq_detail(rfq_id, db_path=None):
-    conn = get_conn(db_path)
+    conn = _read_conn(db_path)
     rfq = conn.execute("SELECT * FROM rfqs WHERE rfq_id=?", (rfq_id,)).fetchone()
     if not rfq:
-        conn.close()
         return None
     items = conn.execute(
         "SELECT * FROM rfq_items WHERE rfq_id=? ORDER BY CAST(item_number AS REAL), item_number",
@@ -163,7 +294,6 @@ def get_rfq_detail(rfq_id, db_path=None):
                 WHERE b.item_id IN ({placeholders})""",
             item_ids
         ).fetchall()
-    conn.close()
 
     # Organise bids by item_id
     bids_by_item = {}
@@ -191,10 +321,20 @@ def get_or_create_bidder(name, conn):
     return cur.lastrowid
 
 
+def _bidder_ids(names, conn):
+    """{name: id} for those of names already in bidders."""
+    ids = {}
+    for start in range(0, len(names), 500):      # stay under SQLite's bound-variable limit
+        chunk = names[start:start + 500]
+        ids.update(conn.execute(
+            f"SELECT name, id FROM bidders WHERE name IN ({','.join('?' * len(chunk))})", chunk
+        ).fetchall())
+    return ids
+
+
 def get_all_bidders(db_path=None):
-    conn = get_conn(db_path)
+    conn = _read_conn(db_path)
     rows = conn.execute("SELECT name FROM bidders ORDER BY name").fetchall()
-    conn.close()
     return [r["name"] for r in rows]
 
 
@@ -208,8 +348,20 @@ def load_parsed_rfq(rfq_id, creator, station, project, rfq_date, source_file, sh
     Insert an RFQ with all its items and bids in a single transaction.
     If the RFQ already exists it is deleted first (reload behaviour).
     """
+    items = parsed_data.get("items", [])
+    # Only bids with at least one price are stored (others = did not quote)
+    item_bids = [
+        [(name, p.get("unit_price"), p.get("ext_price"))
+         for name, p in item.get("bids", {}).items()
+         if p.get("unit_price") is not None or p.get("ext_price") is not None]
+        for item in items
+    ]
+
     conn = get_conn(db_path)
     try:
+        # Take the write lock up front rather than on the first statement
+        conn.execute("BEGIN IMMEDIATE")
+
         # Remove existing data for this RFQ
         conn.execute("DELETE FROM rfqs WHERE rfq_id=?", (rfq_id,))
 
@@ -222,27 +374,36 @@ def load_parsed_rfq(rfq_id, creator, station, project, rfq_date, source_file, sh
              1 if is_potential else 0, notes)
         )
 
-        for item in parsed_data.get("items", []):
-            cur = conn.execute(
-                """INSERT INTO rfq_items (rfq_id, item_number, item_type, specification,
-                                          size, unit, quantity)
-                   VALUES (?,?,?,?,?,?,?)""",
-                (rfq_id, item["item_number"], item["item_type"], item["specification"],
-                 item.get("size"), item.get("unit"), item.get("quantity"))
-            )
-            item_id = cur.lastrowid
-
-            for bidder_name, price_data in item.get("bids", {}).items():
-                up = price_data.get("unit_price")
-                ep = price_data.get("ext_price")
-                if up is None and ep is None:
-                    continue          # bidder did not quote this item
-                bidder_id = get_or_create_bidder(bidder_name, conn)
-                conn.execute(
-                    """INSERT INTO bids (rfq_id, item_id, bidder_id, unit_price, ext_price)
-                       VALUES (?,?,?,?,?)""",
-                    (rfq_id, item_id, bidder_id, up, ep)
-                )
+        conn.executemany(
+            """INSERT INTO rfq_items (rfq_id, item_number, item_type, specification,
+                                      size, unit, quantity)
+               VALUES (?,?,?,?,?,?,?)""",
+            [(rfq_id, item["item_number"], item["item_type"], item["specification"],
+              item.get("size"), item.get("unit"), item.get("quantity"))
+             for item in items]
+        )
+        # The RFQ's old rows were deleted above, so these are exactly the new
+        # items; AUTOINCREMENT ids keep them in insertion order.
+        item_ids = [r[0] for r in conn.execute(
+            "SELECT id FROM rfq_items WHERE rfq_id=? ORDER BY id", (rfq_id,)
+        )]
+
+        # Look bidders up in one batch and create only the missing ones, in
+        # first-seen order so they get the same ids as one-at-a-time inserts.
+        # (INSERT OR IGNORE would burn AUTOINCREMENT ids on the existing names.)
+        names = list(dict.fromkeys(name for bids in item_bids for name, _, _ in bids))
+        bidder_ids = _bidder_ids(names, conn)
+        missing = [name for name in names if name not in bidder_ids]
+        conn.executemany("INSERT INTO bidders (name) VALUES (?)", [(name,) for name in missing])
+        bidder_ids.update(_bidder_ids(missing, conn))
+
+        conn.executemany(
+            """INSERT INTO bids (rfq_id, item_id, bidder_id, unit_price, ext_price)
+               VALUES (?,?,?,?,?)""",
+            [(rfq_id, item_id, bidder_ids[name], up, ep)
+             for item_id, bids in zip(item_ids, item_bids)
+             for name, up, ep in bids]
+        )
 
         conn.commit()
     except Exception:
@@ -281,23 +442,39 @@ item_type values: PIPE, ELL, TEE, GASKET, VALVE, FLANGE, BOLT, NUT, etc.
 """
 
 
-def run_query(sql, db_path=None):
-    """Execute an arbitrary SELECT and return list-of-dicts."""
-    conn = get_conn(db_path)
-    try:
-        rows = conn.execute(sql).fetchall()
-        return [dict(r) for r in rows]
-    finally:
-        conn.close()
+def run_query(sql, db_path=None, params=()):
+    """
+    Execute an arbitrary SELECT (with optional bound params) and return the
+    rows as sqlite3.Row — read by column name like a dict, without copying
+    each row into one.  The app's JSON provider serialises them as objects.
+    """
+    return _read_conn(db_path).execute(sql, params).fetchall()
+
+
+def iter_query(sql, db_path=None, params=(), batch_size=1000):
+    """
+    Like run_query, but hands rows back lazily in fetchmany batches instead of
+    materialising the whole result.  The statement executes immediately so SQL
+    errors raise here, before the caller starts streaming.
+    """
+    cur = _read_conn(db_path).execute(sql, params)
+
+    def _rows():
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                return
+            yield from batch
+
+    return _rows()
 
 
 def get_context_for_ai(db_path=None):
     """Return a compact JSON-friendly context block for AI queries."""
-    conn = get_conn(db_path)
+    conn = _read_conn(db_path)
     rfqs    = [dict(r) for r in conn.execute("SELECT rfq_id, station, rfq_date, is_potential FROM rfqs").fetchall()]
     bidders = [r[0] for r in conn.execute("SELECT name FROM bidders ORDER BY name").fetchall()]
     types   = [r[0] for r in conn.execute(
         "SELECT DISTINCT item_type FROM rfq_items WHERE item_type IS NOT NULL AND item_type!='' ORDER BY item_type"
     ).fetchall()]
-    conn.close()
     return {"rfqs": rfqs, "bidders": bidders, "item_types": types}
@@ -9,24 +9,88 @@ Handles three observed formats:
              Per-bidder cols: UNIT COST, EXT. COST, DELIVERY ARO, COMMENTS, DELIVERY DATE
 """
 
+import os
 import re
+import sys
+from datetime import date, datetime
+from functools import lru_cache
+from itertools import chain, islice
+from operator import itemgetter
+
 import openpyxl
 
+try:
+    from python_calamine import CalamineError, CalamineWorkbook, WorksheetNotFound
+except ImportError:
+    CalamineWorkbook = None
+
 
 # ---------------------------------------------------------------------------
 # Synonym maps — all lowercased for matching
 # ---------------------------------------------------------------------------
-UNIT_PRICE_SYNONYMS  = {"unit price", "unit cost", "unit_price", "unit_cost", "unitprice"}
-EXT_PRICE_SYNONYMS   = {
+UNIT_PRICE_SYNONYMS  = frozenset({"unit price", "unit cost", "unit_price", "unit_cost", "unitprice"})
+EXT_PRICE_SYNONYMS   = frozenset({
     "total price", "ext. price", "ext price", "extended price",
     "ext. cost", "ext cost", "extended cost", "total_price",
     "ext_price", "ext_cost", "totalprice", "extprice"
+})
+ITEM_NUM_SYNONYMS    = frozenset({"item #", "item#", "item no", "item no.", "item number", "line no", "line no."})
+DESC_SYNONYMS        = frozenset({"description", "desc"})
+UNIT_SYNONYMS        = frozenset({"unit", "units", "unit of measure", "uom"})
+QTY_SYNONYMS         = frozenset({"qty quoted", "qty", "quantity", "units quoted", "qty quoted"})
+SIZE_SYNONYMS        = frozenset({"size"})
+
+# Normalised header -> ("rfq", rfq_map key) or ("price", bid role), so a
+# column is classified with one lookup instead of a chain of set tests.
+# The synonym groups are disjoint, so no header can claim two roles.
+_HEADER_ROLES = {
+    syn: role
+    for syns, role in ((ITEM_NUM_SYNONYMS,   ("rfq", "item_num")),
+                       (DESC_SYNONYMS,       ("rfq", "description")),
+                       (UNIT_SYNONYMS,       ("rfq", "unit")),
+                       (QTY_SYNONYMS,        ("rfq", "quantity")),
+                       (SIZE_SYNONYMS,       ("rfq", "size")),
+                       (UNIT_PRICE_SYNONYMS, ("price", "unit_price")),
+                       (EXT_PRICE_SYNONYMS,  ("price", "ext_price")))
+    for syn in syns
 }
-ITEM_NUM_SYNONYMS    = {"item #", "item#", "item no", "item no.", "item number", "line no", "line no."}
-DESC_SYNONYMS        = {"description", "desc"}
-UNIT_SYNONYMS        = {"unit", "units", "unit of measure", "uom"}
-QTY_SYNONYMS         = {"qty quoted", "qty", "quantity", "units quoted", "qty quoted"}
-SIZE_SYNONYMS        = {"size"}
+
+# Field part after the last underscore of a Format B header ("WHITCO_UNIT PRICE")
+_UNDER_FIELD_SET     = frozenset({"unit_price", "unit price", "total_price", "total price",
+                                  "unit_cost", "ext_price", "ext_cost", "unit cost", "ext cost"})
+# Last two words of a space-separated Format B price header ("BIDDER UNIT PRICE")
+_PRICE_ENDINGS_2W    = frozenset({
+    "unit price", "unit cost", "total price",
+    "ext price", "ext. price", "extended price",
+    "ext cost", "ext. cost", "extended cost",
+})
+# Header-ish words that never name a bidder in the rows above the header
+_BIDDER_SKIP_WORDS   = frozenset({"rfq", "none", "delivery", "weeks", "manufacturer",
+                                  "comments", "vendor comments", "unit price", "total price"})
+
+# Header / cell patterns, compiled once rather than looked up per cell
+_RE_PRICE_WORDS  = re.compile(r"(unit.?price|unit.?cost|total.?price|ext.?price|ext.?cost)")
+_RE_BIDDER_FIELD = re.compile(r"^[A-Z][A-Z0-9\-]+_(UNIT_PRICE|TOTAL_PRICE|UNIT_COST|EXT_COST|EXT_PRICE)",
+                              re.IGNORECASE)
+_RE_FIELD_SPLIT  = re.compile(r"^(.+?)_(UNIT.?PRICE|UNIT.?COST|TOTAL.?PRICE|EXT.?PRICE|EXT.?COST)$",
+                              re.IGNORECASE)
+# Format B "BIDDER_<field>" endings, one alternation per synonym table.
+# Unit-price synonyms match with their space as-is or as "_"; ext-price
+# synonyms are matched against a header with dots dropped and spaces as "_".
+def _suffix_re(fields):
+    return re.compile("_(?:" + "|".join(sorted(map(re.escape, fields))) + r")\Z")
+
+
+_RE_UNIT_SUFFIX  = _suffix_re({v for syn in UNIT_PRICE_SYNONYMS for v in (syn, syn.replace(" ", "_"))})
+_RE_EXT_SUFFIX   = _suffix_re({syn.replace(" ", "_").replace(".", "") for syn in EXT_PRICE_SYNONYMS})
+_RE_PHONE        = re.compile(r"^[\d\s\.\-\(\)\+]+$")
+
+# Sheet names of recently opened workbooks, so list_sheets after (or before)
+# parse_excel on an unchanged file doesn't open the workbook again
+_SHEET_NAMES_MAX = 32
+_SHEET_NAMES     = {}    # {(abs path, mtime_ns, size): [sheet names]}
+
+_HEADER_SCAN_ROWS = 15     # the column-header row must sit within the first 15 rows
 
 
 def _norm(val):
@@ -36,65 +100,61 @@ def _norm(val):
     return str(val).strip().lower()
 
 
-def _matches(val, synonyms):
-    return _norm(val) in synonyms
-
-
 def _find_header_row(rows):
     """
-    Return (header_row_index, row_values_list) for the row that looks like
-    a column-header row (contains an item# AND description-like column).
-    Searches the first 15 rows.
+    Return (header_row_index, row_values_list, normalised_headers) for the row
+    that looks like a column-header row (contains an item# AND
+    description-like column). Searches the first 15 rows.
+    normalised_headers is _norm() of every header cell, for format detection.
     """
-    for i, row in enumerate(rows[:15]):
-        has_item = any(_matches(c, ITEM_NUM_SYNONYMS) for c in row)
-        has_desc = any(_matches(c, DESC_SYNONYMS) for c in row)
-        if has_item and has_desc:
-            return i, list(row)
-    return None, None
+    for i, row in enumerate(rows[:_HEADER_SCAN_ROWS]):
+        # One pass per row, normalising each cell once; stop as soon as both
+        # columns have turned up
+        norm = []
+        has_item = has_desc = False
+        for c in row:
+            s = _norm(c)
+            norm.append(s)
+            if s in ITEM_NUM_SYNONYMS:
+                has_item = True
+            elif s in DESC_SYNONYMS:
+                has_desc = True
+            else:
+                continue
+            if has_item and has_desc:
+                norm.extend(_norm(c) for c in row[len(norm):])
+                return i, list(row), norm
+    return None, None, None
 
 
-def _detect_format_b(header_cols):
+def _detect_format_b(header_cols, header_norm):
     """
     Format B: any column header matches BIDDER_UNIT_PRICE or BIDDER_TOTAL_PRICE pattern.
     Handles both underscore-separated (WHITCO_UNIT_PRICE) and
     space-separated (WHITCO UNIT PRICE) variants, including EXT> PRICE typo.
+    header_norm is _norm() of each header, as returned by _find_header_row.
     """
-    # Underscore-separated detection (original)
-    for h in header_cols:
-        s = _norm(h)
-        if s and "_" in s:
-            parts = s.rsplit("_", 1)
-            if parts[-1] in {"unit_price", "unit price", "total_price", "total price",
-                              "unit_cost", "ext_price", "ext_cost", "unit cost", "ext cost"}:
-                return True
-            if re.search(r"(unit.?price|unit.?cost|total.?price|ext.?price|ext.?cost)", s):
-                return True
-    for h in header_cols:
-        s = str(h).strip() if h else ""
-        if re.match(r"^[A-Z][A-Z0-9\-]+_(UNIT_PRICE|TOTAL_PRICE|UNIT_COST|EXT_COST|EXT_PRICE)",
-                    s, re.IGNORECASE):
-            return True
-    # Space-separated detection: "BIDDER UNIT PRICE", "BIDDER EXT. PRICE", "BIDDER EXT> PRICE"
-    _PRICE_ENDINGS_2W = {
-        "unit price", "unit cost", "total price",
-        "ext price", "ext. price", "extended price",
-        "ext cost", "ext. cost", "extended cost",
-    }
-    for h in header_cols:
-        if not h:
+    # One pass over the headers, cheapest tests first; any hit decides it
+    for h, s in zip(header_cols, header_norm):
+        if not s:
             continue
-        words = str(h).strip().lower().replace(">", ".").split()
-        if len(words) >= 3:
-            last_two = " ".join(words[-2:])
-            if last_two in _PRICE_ENDINGS_2W:
+        if "_" in s:
+            # Underscore-separated: WHITCO_UNIT_PRICE, WHITCO_unit price, …
+            if s.rsplit("_", 1)[-1] in _UNDER_FIELD_SET:
                 return True
+        # Space-separated: "BIDDER UNIT PRICE", "BIDDER EXT. PRICE", "BIDDER EXT> PRICE"
+        words = s.replace(">", ".").split()
+        if len(words) >= 3 and " ".join(words[-2:]) in _PRICE_ENDINGS_2W:
+            return True
+        if "_" in s and (_RE_PRICE_WORDS.search(s) or _RE_BIDDER_FIELD.match(str(h).strip())):
+            return True
     return False
 
 
-def _parse_format_b(rows, header_idx, header_cols):
+def _parse_format_b(rows, header_idx, header_cols, header_norm):
     """
     Parse Format B: single header row with BIDDER_FIELD columns.
+    header_norm is _norm() of each header, as returned by _find_header_row.
     Returns (rfq_cols_map, bidder_map).
     rfq_cols_map: {field_name: col_index}
     bidder_map: {bidder_name: {unit_price: col, ext_price: col}}
@@ -102,41 +162,30 @@ def _parse_format_b(rows, header_idx, header_cols):
     rfq_map = {}
     bidder_map = {}
 
-    for col_i, h in enumerate(header_cols):
-        if h is None:
+    for col_i, (h, s_low) in enumerate(zip(header_cols, header_norm)):
+        if not s_low:           # blank header: no bidder field or RFQ role
             continue
-        s = str(h).strip()
-        s_low = s.lower()
+        s = str(h).strip()      # raw header; bidder names are cut from it
 
         # Check if it's a compound BIDDER_FIELD column
         # Try to split on the last underscore-separated keyword
         matched_bidder = None
         matched_field  = None
 
-        for syn in UNIT_PRICE_SYNONYMS:
-            syn_under = syn.replace(" ", "_")
-            if s_low.endswith("_" + syn_under) or s_low.endswith("_" + syn):
-                candidate = s[:-(len(syn_under)+1)].rstrip("_")
-                matched_bidder = candidate.upper()
-                matched_field  = "unit_price"
-                break
+        # Cut the bidder off the raw header by the length of the matched ending
+        m = _RE_UNIT_SUFFIX.search(s_low)
+        if m:
+            matched_bidder = s[:-len(m.group())].rstrip("_").upper()
+            matched_field  = "unit_price"
         if not matched_bidder:
-            for syn in EXT_PRICE_SYNONYMS:
-                syn_under = syn.replace(" ", "_").replace(".", "")
-                s_test = s_low.replace(".", "").replace(" ", "_")
-                syn_test = syn_under.replace(".", "")
-                if s_test.endswith("_" + syn_test):
-                    candidate = s[:-(len(syn_under)+1)].rstrip("_")
-                    matched_bidder = candidate.upper()
-                    matched_field  = "ext_price"
-                    break
+            m = _RE_EXT_SUFFIX.search(s_low.replace(".", "").replace(" ", "_"))
+            if m:
+                matched_bidder = s[:-len(m.group())].rstrip("_").upper()
+                matched_field  = "ext_price"
 
         # Fallback: regex split on well-known underscore patterns
         if not matched_bidder:
-            m = re.match(
-                r"^(.+?)_(UNIT.?PRICE|UNIT.?COST|TOTAL.?PRICE|EXT.?PRICE|EXT.?COST)$",
-                s, re.IGNORECASE
-            )
+            m = _RE_FIELD_SPLIT.match(s)
             if m:
                 matched_bidder = m.group(1).upper()
                 field_raw = m.group(2).lower()
@@ -161,21 +210,15 @@ def _parse_format_b(rows, header_idx, header_cols):
 
         if matched_bidder and matched_field:
             if matched_bidder not in bidder_map:
+                matched_bidder = sys.intern(matched_bidder)     # one string per bidder across workbooks
                 bidder_map[matched_bidder] = {}
             bidder_map[matched_bidder][matched_field] = col_i
             continue
 
         # RFQ columns
-        if _matches(h, ITEM_NUM_SYNONYMS):
-            rfq_map["item_num"] = col_i
-        elif _matches(h, DESC_SYNONYMS):
-            rfq_map["description"] = col_i
-        elif _matches(h, UNIT_SYNONYMS):
-            rfq_map["unit"] = col_i
-        elif _matches(h, QTY_SYNONYMS):
-            rfq_map["quantity"] = col_i
-        elif _matches(h, SIZE_SYNONYMS):
-            rfq_map["size"] = col_i
+        role = _HEADER_ROLES.get(s_low)
+        if role and role[0] == "rfq":
+            rfq_map[role[1]] = col_i
 
     return rfq_map, bidder_map
 
@@ -196,42 +239,42 @@ def _find_bidder_names_above(rows, header_idx):
       - short enough to be a company abbreviation/name (< 40 chars)
       - not a known skip-word (RFQ, DELIVERY, WEEKS, etc.)
     """
-    SKIP_WORDS = {"rfq", "none", "delivery", "weeks", "manufacturer",
-                  "comments", "vendor comments", "unit price", "total price"}
-
-    best_row   = {}
-    best_score = 0   # prefer rows with shorter average candidate length (abbreviations)
+    best_row = {}
+    best_len = best_n = 0   # total name length / count of the best row so far
 
     for i in range(header_idx):
         row = rows[i]
         candidates = {}
+        total_len  = 0
         for col_i, val in enumerate(row):
             if val is None:
                 continue
             s = str(val).strip()
+            # Cheapest rejections first; every test here only skips the cell
             if not s or len(s) > 50:
                 continue
-            if _norm(s) in SKIP_WORDS:
-                continue
-            # Skip phone-like values
-            if re.match(r"^[\d\s\.\-\(\)\+]+$", s):
-                continue
             # Skip email addresses
             if "@" in s:
                 continue
+            if s.lower() in _BIDDER_SKIP_WORDS:     # s is already stripped
+                continue
+            # Skip phone-like values.  s is stripped, so a phone starts with a
+            # digit or one of .-()+ ; names fail that and never reach the regex
+            if (s[0].isdecimal() or s[0] in ".-()+") and _RE_PHONE.match(s):
+                continue
             # Skip long multi-word strings that look like contact names or addresses
-            words = s.split()
-            if len(words) > 4:
+            if len(s.split()) > 4:
                 continue
-            candidates[col_i] = s.upper()
+            name = candidates[col_i] = s.upper()
+            total_len += len(name)
 
-        if len(candidates) >= 2:
-            avg_len = sum(len(v) for v in candidates.values()) / len(candidates)
-            # Prefer shorter names (company abbrevs) over longer names (full contact names)
-            score = 1.0 / avg_len
-            if score > best_score:
-                best_score = score
-                best_row   = candidates
+        # Prefer shorter names (company abbrevs) over longer names (full
+        # contact names): lowest average length wins, the top-most row on a
+        # tie.  Averages are compared cross-multiplied, without dividing.
+        n = len(candidates)
+        if n >= 2 and (not best_n or total_len * best_n < best_len * n):
+            best_len, best_n = total_len, n
+            best_row = candidates
 
     return best_row
 
@@ -252,40 +295,29 @@ def _parse_format_ac(rows, header_idx, header_cols):
     for col_i, h in enumerate(header_cols):
         if h is None:
             continue
-        if _matches(h, ITEM_NUM_SYNONYMS):
-            rfq_map["item_num"] = col_i
-        elif _matches(h, DESC_SYNONYMS):
-            rfq_map["description"] = col_i
-        elif _matches(h, UNIT_SYNONYMS):
-            rfq_map["unit"] = col_i
-        elif _matches(h, QTY_SYNONYMS):
-            rfq_map["quantity"] = col_i
-        elif _matches(h, SIZE_SYNONYMS):
-            rfq_map["size"] = col_i
-        elif _norm(h) in UNIT_PRICE_SYNONYMS:
-            col_roles[col_i] = "unit_price"
-        elif _norm(h) in EXT_PRICE_SYNONYMS:
-            col_roles[col_i] = "ext_price"
-
-    # Step 3: assign price columns to the nearest bidder on the left
-    bidder_start_cols = sorted(bidder_names_at_col.keys())
-
-    def _bidder_for_col(col_i):
-        owner = None
-        for bc in bidder_start_cols:
-            if bc <= col_i:
-                owner = bc
-            else:
-                break
-        if owner is not None:
-            return bidder_names_at_col[owner]
-        return None
+        role = _HEADER_ROLES.get(_norm(h))
+        if role is None:
+            continue
+        kind, key = role
+        if kind == "rfq":
+            rfq_map[key] = col_i
+        else:
+            col_roles[col_i] = key
+
+    # Step 3: assign price columns to the nearest bidder on the left, via one
+    # left-to-right sweep that records the owning bidder of every column
+    owner_of = []
+    current  = None
+    for col_i in range(len(header_cols)):
+        current = bidder_names_at_col.get(col_i, current)
+        owner_of.append(current)
 
     bidder_map = {}
     for col_i, role in col_roles.items():
-        name = _bidder_for_col(col_i)
+        name = owner_of[col_i]
         if name:
             if name not in bidder_map:
+                name = sys.intern(name)     # one string per bidder across workbooks
                 bidder_map[name] = {}
             bidder_map[name][role] = col_i
 
@@ -315,22 +347,18 @@ def _extract_type_spec(description, size_val=None):
     return item_type, spec
 
 
-def _is_data_row(row, rfq_map):
-    """Return True if this row looks like an item data row (has an item number)."""
-    item_col = rfq_map.get("item_num")
-    if item_col is None or item_col >= len(row):
-        return False
-    val = row[item_col]
-    if val is None:
-        return False
-    s = str(val).strip()
-    # Item numbers are typically numeric or alphanumeric short codes
-    return bool(s) and len(s) < 20
-
-
 def _safe_float(val):
+    # Exact-type checks, most common first: openpyxl hands numeric cells back
+    # as float or int already, so those skip the call and exception machinery
+    t = type(val)
+    if t is float:
+        return val
     if val is None:
         return None
+    if t is int:
+        return float(val)
+    if t is str:
+        return _safe_float_str(val)
     try:
         return float(val)
     except (ValueError, TypeError):
@@ -341,6 +369,131 @@ def _safe_float(val):
             return None
 
 
+@lru_cache(maxsize=4096)
+def _safe_float_str(val):
+    """
+    String branch of _safe_float. Price columns repeat the same strings
+    ("$0.00", "N/A", "NO BID"), so each distinct one pays the exceptions once.
+    """
+    try:
+        return float(val)
+    except ValueError:
+        s = val.replace(",", "").replace("$", "").strip()
+        try:
+            return float(s)
+        except ValueError:
+            return None
+
+
+def _sheet_rows(ws):
+    """
+    Stream the rows of a read-only worksheet as value tuples. The sheet's
+    dimension tag is ignored: some writers leave it stale, and read-only mode
+    would otherwise truncate to it.
+    """
+    ws.reset_dimensions()
+    return ws.iter_rows(values_only=True)
+
+
+def _row_getter(cols):
+    """itemgetter over cols that returns a tuple even for a single column."""
+    if len(cols) == 1:
+        col = cols[0]
+        return lambda row: (row[col],)
+    return itemgetter(*cols)
+
+
+def _file_sig(filepath):
+    """Cache key for a workbook file: changes whenever the file is rewritten."""
+    st = os.stat(filepath)
+    return (os.path.abspath(filepath), st.st_mtime_ns, st.st_size)
+
+
+def _from_calamine(val):
+    """
+    Map a calamine cell value onto what openpyxl would have returned, so the
+    parser sees the same types: empty cells are None, whole numbers are int
+    (calamine reports every number as float) and date cells are datetime.
+    """
+    t = type(val)
+    if t is str:
+        return val or None
+    if t is float:
+        return int(val) if val.is_integer() else val
+    if t is date:
+        return datetime(val.year, val.month, val.day)
+    return val
+
+
+def _calamine_rows(sheet, nrows=None):
+    """
+    Rows of a calamine sheet, padded from A1 like openpyxl's.  With nrows,
+    only that many top rows are converted (the header window); otherwise
+    rows are converted one at a time as the parser consumes them.
+    """
+    if sheet.end is None:
+        return iter(())
+    if nrows is not None:
+        return (list(map(_from_calamine, row))
+                for row in sheet.to_python(skip_empty_area=False, nrows=nrows))
+    # iter_rows starts at the first used column; openpyxl's rows start at A
+    pad = (None,) * sheet.start[1]
+    return ([*pad, *map(_from_calamine, row)] for row in sheet.iter_rows())
+
+
+def _open_workbook(filepath):
+    """
+    Open filepath for reading. Returns (sheet names, rows, n_rows, close):
+    rows(name, nrows=None) streams a sheet's rows (or just its first nrows)
+    as value sequences, n_rows(name) counts them, and close() releases the
+    file.
+
+    python-calamine reads the XLSX through a Rust backend and is much faster
+    than openpyxl on large bid tabs; it is used when installed, with openpyxl
+    in read_only mode as the fallback.
+    """
+    if CalamineWorkbook is not None:
+        try:
+            wb = CalamineWorkbook.from_path(filepath)
+        except CalamineError:
+            wb = None           # openpyxl gets its own try at the file
+        if wb is not None:
+            loaded = {}
+
+            def _sheet(name):
+                if name not in loaded:
+                    try:
+                        loaded[name] = wb.get_sheet_by_name(name)
+                    except WorksheetNotFound:
+                        raise KeyError(f"Worksheet {name} does not exist.") from None
+                return loaded[name]
+
+            def n_rows(name):
+                end = _sheet(name).end
+                return end[0] + 1 if end else 0
+
+            def rows(name, nrows=None):
+                return _calamine_rows(_sheet(name), nrows)
+
+            return wb.sheet_names, rows, n_rows, wb.close
+
+    # read_only streams the sheet XML instead of building the full object
+    # model; the zip handle stays open until close()
+    wb = openpyxl.load_workbook(filepath, data_only=True, read_only=True)
+
+    def rows(name, nrows=None):
+        it = _sheet_rows(wb[name])
+        return it if nrows is None else islice(it, nrows)
+
+    return wb.sheetnames, rows, lambda name: sum(1 for _ in rows(name)), wb.close
+
+
+def _remember_sheets(sig, names):
+    if len(_SHEET_NAMES) >= _SHEET_NAMES_MAX:
+        _SHEET_NAMES.pop(next(iter(_SHEET_NAMES)), None)
+    _SHEET_NAMES[sig] = list(names)
+
+
 def parse_excel(filepath, sheet_name=None):
     """
     Main entry point. Parse an RFQ Excel file.
@@ -368,41 +521,60 @@ def parse_excel(filepath, sheet_name=None):
       "ambiguities": [list of warning strings]
     }
     """
-    wb = openpyxl.load_workbook(filepath, data_only=True)
-
-    # Pick the best sheet
-    if sheet_name:
-        ws = wb[sheet_name]
-    else:
-        # Prefer sheets with the most data; skip Dashboard/Terms sheets
-        best = None
-        best_rows = 0
-        skip_keywords = {"dashboard", "terms", "condition", "sheet2", "alternative"}
-        for sn in wb.sheetnames:
-            if any(k in sn.lower() for k in skip_keywords):
-                continue
-            s = wb[sn]
-            if s.max_row > best_rows:
-                best_rows = s.max_row
-                best = sn
-        if best is None:
-            best = wb.sheetnames[0]
-        ws = wb[best]
-        sheet_name = best
-
-    rows = [list(r) for r in ws.iter_rows(values_only=True)]
+    sig = _file_sig(filepath)
+    sheetnames, rows, n_rows, close = _open_workbook(filepath)
+    try:
+        _remember_sheets(sig, sheetnames)
+        # Pick the best sheet
+        if not sheet_name:
+            # Prefer sheets with the most data; skip Dashboard/Terms sheets.
+            # Sheets with an Item #/Description header in their first rows
+            # outrank those without, which only needs the header window.
+            # A lone candidate wins outright, so rows are only counted (one
+            # streaming pass per sheet) when there is a real choice to make.
+            skip_keywords = {"dashboard", "terms", "condition", "sheet2", "alternative"}
+            candidates = [sn for sn in sheetnames
+                          if not any(k in sn.lower() for k in skip_keywords)]
+            if len(candidates) > 1:
+                with_header = [sn for sn in candidates
+                               if _find_header_row(list(rows(sn, _HEADER_SCAN_ROWS)))[0] is not None]
+                if with_header:
+                    candidates = with_header
+            best = candidates[0] if len(candidates) == 1 else None
+            best_rows = 0
+            for sn in (candidates if best is None else ()):
+                sn_rows = max(n_rows(sn), 1)   # an empty sheet still counts as one row
+                if sn_rows > best_rows:
+                    best_rows = sn_rows
+                    best = sn
+            if best is None:
+                best = sheetnames[0]
+            sheet_name = best
+        return _parse_rows(rows(sheet_name), sheet_name)
+    finally:
+        close()
+
+
+def _parse_rows(row_iter, sheet_name):
+    """
+    Parse one sheet's rows for parse_excel. Only the header-search window is
+    held in memory; data rows are consumed straight off row_iter.
+    """
+    rows = list(islice(row_iter, _HEADER_SCAN_ROWS))
     if not rows:
         return {"error": "Sheet is empty", "sheet": sheet_name}
 
     # Find header row
-    header_idx, header_cols = _find_header_row(rows)
+    header_idx, header_cols, header_norm = _find_header_row(rows)
     if header_idx is None:
         return {"error": "Could not locate column header row", "sheet": sheet_name}
 
     # Detect format
-    if _detect_format_b(header_cols):
+    # Format B never needs the bidder-name rows above the header; only the
+    # A/C path calls _find_bidder_names_above
+    if _detect_format_b(header_cols, header_norm):
         fmt = "B"
-        rfq_map, bidder_map = _parse_format_b(rows, header_idx, header_cols)
+        rfq_map, bidder_map = _parse_format_b(rows, header_idx, header_cols, header_norm)
     else:
         fmt = "AC"
         rfq_map, bidder_map = _parse_format_ac(rows, header_idx, header_cols)
@@ -415,36 +587,58 @@ def parse_excel(filepath, sheet_name=None):
     if "description" not in rfq_map:
         ambiguities.append("Could not locate Description column.")
 
-    # Parse data rows
+    # Parse data rows.  Column positions are fixed once the header is mapped,
+    # so every cell the loop reads is gathered per row by one C-level
+    # itemgetter.  Each gathered tuple ends with a None that unmapped
+    # columns read through slot -1.
+    item_col = rfq_map.get("item_num")
+    wanted   = [] if item_col is None else [item_col]     # sheet columns read per row
+
+    def _slot(col):
+        if col is None:
+            return -1
+        if col not in wanted:
+            wanted.append(col)
+        return wanted.index(col)
+
+    desc_i, size_i, unit_i, qty_i = (_slot(rfq_map.get(k)) for k in ("description", "size", "unit", "quantity"))
+    bid_slots = [(name, _slot(cols.get("unit_price")), _slot(cols.get("ext_price")))
+                 for name, cols in bidder_map.items()]
+
     items = []
-    for row in rows[header_idx + 1:]:
-        if not _is_data_row(row, rfq_map):
+    if item_col is not None:
+        gather    = _row_getter(wanted)
+        width     = max(wanted) + 1
+        data_rows = chain(rows[header_idx + 1:], row_iter)
+    else:
+        data_rows = ()
+    for row in data_rows:
+        if len(row) < width:        # ragged row: missing trailing cells are empty
+            row = (*row, *(None,) * (width - len(row)))
+        cells = (*gather(row), None)
+        # A data row has an item number: numeric or a short alphanumeric code
+        raw_item = cells[0]
+        if raw_item is None:
+            continue
+        item_str = str(raw_item).strip()
+        if not item_str or len(item_str) >= 20:
             continue
 
-        def _cell(col_key):
-            col = rfq_map.get(col_key)
-            if col is not None and col < len(row):
-                return row[col]
-            return None
-
-        raw_desc = _cell("description")
-        raw_size = _cell("size")
-        raw_unit = _cell("unit")
-        raw_qty  = _cell("quantity")
-        raw_item = _cell("item_num")
+        raw_desc = cells[desc_i]
+        raw_size = cells[size_i]
+        raw_unit = cells[unit_i]
+        raw_qty  = cells[qty_i]
 
         item_type, spec = _extract_type_spec(raw_desc, raw_size)
 
         bids = {}
-        for bidder_name, cols in bidder_map.items():
-            up_col = cols.get("unit_price")
-            ep_col = cols.get("ext_price")
-            up_val = _safe_float(row[up_col]) if (up_col is not None and up_col < len(row)) else None
-            ep_val = _safe_float(row[ep_col]) if (ep_col is not None and ep_col < len(row)) else None
+        for bidder_name, up_i, ep_i in bid_slots:
+            up_val = _safe_float(cells[up_i])
+            ep_val = _safe_float(cells[ep_i])
             bids[bidder_name] = {"unit_price": up_val, "ext_price": ep_val}
 
         items.append({
-            "item_number":   str(raw_item).strip() if raw_item else "",
+            "item_number":   item_str if raw_item else "",
             "item_type":     item_type,
             "specification": spec,
             "size":          str(raw_size).strip() if raw_size else None,
@@ -465,5 +659,10 @@ def parse_excel(filepath, sheet_name=None):
 
 def list_sheets(filepath):
     """Return list of sheet names in the workbook."""
-    wb = openpyxl.load_workbook(filepath, read_only=True)
-    return wb.sheetnames
+    sig   = _file_sig(filepath)
+    names = _SHEET_NAMES.get(sig)
+    if names is None:
+        names, _, _, close = _open_workbook(filepath)
+        close()
+        _remember_sheets(sig, names)
+    return list(names)